@@ -0,0 +1,293 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from config import Config
+
+class JobVectorIndex:
+    """Persistent inverted-file (IVF) index for maximum inner product search.
+
+    Vectors are clustered around ``lists`` k-means centroids. A query only
+    scans the ``probes`` lists whose centroids are closest to it, so its cost
+    grows with the size of a few lists, not the corpus. Below
+    ``ANN_MIN_TRAIN_SIZE`` vectors the index scans everything exactly. It
+    retrains once the corpus has grown ``ANN_RETRAIN_GROWTH`` times since the
+    last training.
+
+    Inserts are assigned to their nearest centroid right away. Deletes mark
+    rows dead and the index compacts once a quarter of the rows are dead.
+    ``save`` writes the live rows, keys and centroids to ``path``, and they
+    are loaded again on start.
+    """
+
+    def __init__(self, path: Optional[str] = None, dimensions: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.path = path or self.config.ANN_INDEX_DIR
+        self.dimensions = dimensions or self.config.ANN_DIMENSIONS
+        self.probes = self.config.ANN_PROBES
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((1024, self.dimensions), dtype=np.float32)
+        self._added_at = np.zeros(1024, dtype=np.float64)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._dead = 0
+
+        self._centroids: Optional[np.ndarray] = None
+        self._assignment = np.zeros(1024, dtype=np.int32)
+        self._members: List[List[int]] = []
+        self._member_arrays: List[Optional[np.ndarray]] = []
+        self._trained_size = 0
+        self._dirty = False
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._rows)
+
+    def add(self, keys: List[str], vectors: np.ndarray):
+        """Insert or replace vectors by key"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(keys), self.dimensions)
+        now = time.time()
+        with self._lock:
+            replaced = [key for key in keys if key in self._rows]
+            if replaced:
+                self._remove(replaced)
+
+            start = len(self._keys)
+            self._reserve(start + len(keys))
+            rows = np.arange(start, start + len(keys))
+            self._vectors[rows] = vectors
+            self._added_at[rows] = now
+            self._alive[rows] = True
+            for key, row in zip(keys, rows):
+                self._rows[key] = int(row)
+            self._keys.extend(keys)
+            self._dirty = True
+
+            if self._centroids is not None:
+                self._assign(rows)
+
+            size = len(self._rows)
+            if size >= self.config.ANN_MIN_TRAIN_SIZE and (
+                self._centroids is None or size >= self._trained_size * self.config.ANN_RETRAIN_GROWTH
+            ):
+                self._train()
+
+    def remove(self, keys: Iterable[str]):
+        """Delete vectors by key; unknown keys are ignored"""
+        with self._lock:
+            self._remove(keys)
+
+    def prune(self, max_age_days: Optional[float] = None) -> int:
+        """Delete vectors added more than ``max_age_days`` ago"""
+        max_age_days = max_age_days or self.config.JOB_INDEX_RETENTION_DAYS
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:len(self._keys)] & (self._added_at[:len(self._keys)] < cutoff))
+            self._remove([self._keys[row] for row in rows])
+            return len(rows)
+
+    def search(self, query: np.ndarray, k: int = 10, probes: Optional[int] = None) -> List[Tuple[str, float]]:
+        """The ``k`` keys with the largest inner product with ``query``, best first"""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        probes = probes or self.probes
+        with self._lock:
+            if not self._rows:
+                return []
+
+            if self._centroids is None:
+                candidates = np.flatnonzero(self._alive[:len(self._keys)])
+            else:
+                nearest = np.argpartition(-(self._centroids @ query), min(probes, len(self._centroids)) - 1)[:probes]
+                candidates = np.concatenate([self._list_rows(int(list_id)) for list_id in nearest])
+                candidates = candidates[self._alive[candidates]]
+
+            if len(candidates) == 0:
+                return []
+            scores = self._vectors[candidates] @ query
+            if len(scores) > k:
+                best = np.argpartition(-scores, k - 1)[:k]
+            else:
+                best = np.arange(len(scores))
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return [(self._keys[candidates[i]], float(scores[i])) for i in best]
+
+    def save(self):
+        """Write the live rows, keys and centroids to disk"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._compact()
+            count = len(self._keys)
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                self._write('vectors.npy', self._vectors[:count])
+                self._write('added_at.npy', self._added_at[:count])
+                if self._centroids is not None:
+                    self._write('centroids.npy', self._centroids)
+                    self._write('assignment.npy', self._assignment[:count])
+                else:
+                    for name in ('centroids.npy', 'assignment.npy'):
+                        if os.path.exists(os.path.join(self.path, name)):
+                            os.remove(os.path.join(self.path, name))
+                self._write_keys()
+                self._dirty = False
+            except Exception as e:
+                self.logger.error(f"Error saving vector index: {e}")
+
+    def _remove(self, keys: Iterable[str]):
+        for key in keys:
+            row = self._rows.pop(key, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            self._dead += 1
+            self._dirty = True
+        if self._dead > max(1024, len(self._keys) // 4):
+            self._compact()
+
+    def _compact(self):
+        """Drop dead rows and renumber the live ones"""
+        if not self._dead:
+            return
+        live = np.flatnonzero(self._alive[:len(self._keys)])
+        count = len(live)
+        self._vectors[:count] = self._vectors[live]
+        self._added_at[:count] = self._added_at[live]
+        self._assignment[:count] = self._assignment[live]
+        self._alive[:] = False
+        self._alive[:count] = True
+        self._keys = [self._keys[row] for row in live]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._dead = 0
+        if self._centroids is not None:
+            self._rebuild_lists()
+
+    def _reserve(self, size: int):
+        capacity = len(self._vectors)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ('_vectors', '_added_at', '_alive', '_assignment'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _train(self):
+        """Cluster a sample of the live vectors and reassign every row"""
+        live = np.flatnonzero(self._alive[:len(self._keys)])
+        lists = max(1, min(self.config.ANN_LISTS, len(live) // 39))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[rng.choice(live, size=min(len(live), lists * 64), replace=False)]
+
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+        for _ in range(self.config.ANN_TRAIN_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=lists)
+            # Empty clusters keep their previous centroid
+            filled = counts > 0
+            centroids[filled] = sums[filled]
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+
+        self._centroids = centroids
+        self._trained_size = len(live)
+        self._members = []
+        self._assign(np.arange(len(self._keys)))
+        self._rebuild_lists()
+        self.logger.info(f"Trained vector index: {lists} lists over {len(live)} vectors")
+
+    def _assign(self, rows: np.ndarray):
+        for start in range(0, len(rows), 65536):
+            chunk = rows[start:start + 65536]
+            labels = np.argmax(self._vectors[chunk] @ self._centroids.T, axis=1).astype(np.int32)
+            self._assignment[chunk] = labels
+            if len(self._members) == len(self._centroids):
+                for row, label in zip(chunk.tolist(), labels.tolist()):
+                    self._members[label].append(row)
+                    self._member_arrays[label] = None
+
+    def _rebuild_lists(self):
+        count = len(self._keys)
+        order = np.argsort(self._assignment[:count], kind='stable')
+        bounds = np.searchsorted(self._assignment[:count][order], np.arange(len(self._centroids) + 1))
+        self._members = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(len(self._centroids))]
+        self._member_arrays = [None] * len(self._centroids)
+
+    def _list_rows(self, list_id: int) -> np.ndarray:
+        rows = self._member_arrays[list_id]
+        if rows is None:
+            rows = np.asarray(self._members[list_id], dtype=np.int64)
+            self._member_arrays[list_id] = rows
+        return rows
+
+    def _write(self, name: str, array: np.ndarray):
+        target = os.path.join(self.path, name)
+        with open(target + '.tmp', 'wb') as f:
+            np.save(f, array)
+        os.replace(target + '.tmp', target)
+
+    def _write_keys(self):
+        target = os.path.join(self.path, 'keys.txt')
+        with open(target + '.tmp', 'w', encoding='utf-8') as f:
+            f.write("\n".join(self._keys))
+        os.replace(target + '.tmp', target)
+
+    def _load(self):
+        keys_path = os.path.join(self.path, 'keys.txt')
+        if not os.path.exists(keys_path):
+            return
+        try:
+            with open(keys_path, encoding='utf-8') as f:
+                keys = f.read().split("\n") if os.path.getsize(keys_path) else []
+            vectors = np.load(os.path.join(self.path, 'vectors.npy'))
+            if vectors.shape != (len(keys), self.dimensions):
+                self.logger.warning("Vector index on disk doesn't match the configured dimensions, starting empty")
+                return
+
+            self._reserve(len(keys))
+            self._vectors[:len(keys)] = vectors
+            self._added_at[:len(keys)] = np.load(os.path.join(self.path, 'added_at.npy'))
+            self._alive[:len(keys)] = True
+            self._keys = keys
+            self._rows = {key: row for row, key in enumerate(keys)}
+
+            centroids_path = os.path.join(self.path, 'centroids.npy')
+            if os.path.exists(centroids_path):
+                self._centroids = np.load(centroids_path)
+                self._assignment[:len(keys)] = np.load(os.path.join(self.path, 'assignment.npy'))
+                self._trained_size = len(keys)
+                self._rebuild_lists()
+
+            self.logger.info(f"Loaded vector index with {len(keys)} vectors")
+        except Exception as e:
+            self.logger.error(f"Error loading vector index: {e}")
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_job_vector_index() -> JobVectorIndex:
+    """Return the process-wide job vector index, saved on exit"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = JobVectorIndex()
+            _index.prune()
+            atexit.register(_index.save)
+        return _index
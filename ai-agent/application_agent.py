@@ -1,143 +1,235 @@
+import re
 import time
 import random
 import logging
-import sqlite3
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from selenium import webdriver
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from fake_useragent import UserAgent
 
 from config import Config
+from driver_pool import get_driver_pool
 from profile_analyzer import ProfileAnalyzer
-from job_scraper import JobScraper
+from job_ranker import JobPreRanker
+from job_scraper import JobScraper, search_location
+from job_dedup import canonicalize_url, get_job_index
+from cover_letters import get_cover_letter_store
+from storage import get_storage
+from application_recorder import get_application_recorder
+from applied_jobs import get_applied_jobs
+from rate_limiter import get_application_rate_limiter
+
+# Keys the job index assigns; applications recorded before it used title_company ids
+JOB_KEY_RE = re.compile(r'^[0-9a-f]{20}$')
+
+def _rekey_applications(conn):
+    """Move applications recorded under legacy ids to the job index's canonical keys"""
+    index = get_job_index()
+    has_aliases = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_urls'"
+    ).fetchone() is not None
+    rows = conn.execute('SELECT id, job_id, job_title, company, job_url FROM applications').fetchall()
+    for row_id, job_id, title, company, url in rows:
+        if JOB_KEY_RE.match(job_id or ''):
+            continue
+        # Read-only lookup: the index's own connection can't write while
+        # this migration holds the write lock
+        key = index.lookup_key({'title': title, 'company': company, 'url': url})
+        conn.execute('UPDATE applications SET job_id = ? WHERE id = ?', (key, row_id))
+        canonical_url = canonicalize_url(url)
+        if has_aliases and canonical_url:
+            # So the index hands out the same key when it next sees the posting
+            conn.execute('INSERT OR IGNORE INTO job_urls (canonical_url, job_key) VALUES (?, ?)',
+                         (canonical_url, key))
+
+# Schema of the application tables, one list of statements per version. The
+# applied version is kept in PRAGMA user_version; append new versions, never
+# edit one that has shipped.
+APPLICATION_MIGRATIONS = [
+    # 1: original tables
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS applications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            job_id TEXT NOT NULL,
+            job_title TEXT NOT NULL,
+            company TEXT NOT NULL,
+            job_url TEXT NOT NULL,
+            match_score REAL NOT NULL,
+            status TEXT DEFAULT 'applied',
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            cover_letter TEXT,
+            response_received BOOLEAN DEFAULT FALSE,
+            response_date TIMESTAMP NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS application_limits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            date DATE NOT NULL,
+            applications_count INTEGER DEFAULT 0,
+            last_application_time TIMESTAMP NULL,
+            UNIQUE(user_id, date)
+        )
+        '''
+    ],
+    # 2: per-user indexes, and daily counts kept up to date by triggers so
+    # stats read a few rows per user however long the history gets
+    [
+        'CREATE INDEX IF NOT EXISTS idx_applications_user_applied ON applications (user_id, applied_at)',
+        'CREATE INDEX IF NOT EXISTS idx_applications_user_response ON applications (user_id, response_received)',
+        '''
+        CREATE TABLE IF NOT EXISTS application_daily_stats (
+            user_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            applications INTEGER NOT NULL DEFAULT 0,
+            responses INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT OR REPLACE INTO application_daily_stats (user_id, day, applications, responses)
+        SELECT user_id, DATE(applied_at), COUNT(*), SUM(CASE WHEN response_received THEN 1 ELSE 0 END)
+        FROM applications GROUP BY user_id, DATE(applied_at)
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_applications_stats_insert AFTER INSERT ON applications
+        BEGIN
+            INSERT INTO application_daily_stats (user_id, day, applications, responses)
+            VALUES (NEW.user_id, DATE(NEW.applied_at), 1, CASE WHEN NEW.response_received THEN 1 ELSE 0 END)
+            ON CONFLICT (user_id, day) DO UPDATE SET
+                applications = applications + 1,
+                responses = responses + excluded.responses;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_applications_stats_delete AFTER DELETE ON applications
+        BEGIN
+            UPDATE application_daily_stats SET
+                applications = applications - 1,
+                responses = responses - CASE WHEN OLD.response_received THEN 1 ELSE 0 END
+            WHERE user_id = OLD.user_id AND day = DATE(OLD.applied_at);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_applications_stats_update
+        AFTER UPDATE OF user_id, applied_at, response_received ON applications
+        BEGIN
+            UPDATE application_daily_stats SET
+                applications = applications - 1,
+                responses = responses - CASE WHEN OLD.response_received THEN 1 ELSE 0 END
+            WHERE user_id = OLD.user_id AND day = DATE(OLD.applied_at);
+            INSERT INTO application_daily_stats (user_id, day, applications, responses)
+            VALUES (NEW.user_id, DATE(NEW.applied_at), 1, CASE WHEN NEW.response_received THEN 1 ELSE 0 END)
+            ON CONFLICT (user_id, day) DO UPDATE SET
+                applications = applications + 1,
+                responses = responses + excluded.responses;
+        END
+        '''
+    ],
+    # 3: one application per user and canonical job key. Legacy rows are
+    # re-keyed from their URLs first, then only rows for the same posting are
+    # collapsed (the delete trigger keeps the daily stats right)
+    [
+        _rekey_applications,
+        '''
+        DELETE FROM applications WHERE id NOT IN (
+            SELECT MIN(id) FROM applications GROUP BY user_id, job_id
+        )
+        ''',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_user_job ON applications (user_id, job_id)'
+    ],
+    # 4: limits moved to the shared rate limiter's application_slots, seeded
+    # with the last day's applications so upgrading doesn't reset them
+    [
+        '''
+        INSERT INTO application_slots (user_id, source, taken_at)
+        SELECT user_id, '', CAST(strftime('%s', applied_at) AS REAL) FROM applications
+        WHERE applied_at > DATETIME('now', '-1 day')
+        ''',
+        'DROP TABLE IF EXISTS application_limits'
+    ]
+]
 
 class ApplicationAgent:
-    def __init__(self, user_id: str, auth_token: str):
+    def __init__(self, user_id: str, auth_token: str, browser_profile: Optional[str] = None):
         self.config = Config()
         self.user_id = user_id
         self.auth_token = auth_token
         self.logger = logging.getLogger(__name__)
+        self.browser_profile = browser_profile or self.config.APPLICATION_BROWSER_PROFILE
         
         # Initialize components
-        self.profile_analyzer = ProfileAnalyzer()
+        self.profile_analyzer = ProfileAnalyzer(user_id)
+        self.pre_ranker = JobPreRanker() if self.config.PRERANK_ENABLED else None
         self.job_scraper = JobScraper()
         self.driver = None
         
         # Database setup
         self.db_path = self.config.SQLITE_DB
+        self.storage = get_storage(self.db_path)
         self._setup_database()
+        self.recorder = get_application_recorder()
+        self.applied_jobs = get_applied_jobs()
         
-        # Application tracking
-        self.applications_today = 0
-        self.applications_this_hour = 0
-        self.last_application_time = None
+        # Application limits, shared with every other agent and process
+        self.rate_limiter = get_application_rate_limiter()
         
     def _setup_database(self):
         """Setup SQLite database for tracking applications"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS applications (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    job_id TEXT NOT NULL,
-                    job_title TEXT NOT NULL,
-                    company TEXT NOT NULL,
-                    job_url TEXT NOT NULL,
-                    match_score REAL NOT NULL,
-                    status TEXT DEFAULT 'applied',
-                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    cover_letter TEXT,
-                    response_received BOOLEAN DEFAULT FALSE,
-                    response_date TIMESTAMP NULL
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS application_limits (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    date DATE NOT NULL,
-                    applications_count INTEGER DEFAULT 0,
-                    last_application_time TIMESTAMP NULL,
-                    UNIQUE(user_id, date)
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            # The job index's and rate limiter's tables have to exist before
+            # migrations 3 and 4 use them
+            get_job_index()
+            get_application_rate_limiter()
+            self.storage.migrate(APPLICATION_MIGRATIONS)
             
         except Exception as e:
             self.logger.error(f"Error setting up database: {e}")
     
     def setup_driver(self):
-        """Setup Chrome driver for job applications"""
+        """Check out a Chrome driver for job applications from the shared pool"""
         try:
-            chrome_options = Options()
-            
-            if self.config.HEADLESS_MODE:
-                chrome_options.add_argument("--headless")
-            
-            # Anti-detection measures
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            if self.config.USER_AGENT_ROTATION:
-                chrome_options.add_argument(f"--user-agent={UserAgent().random}")
-            
-            self.driver = webdriver.Chrome(
-                ChromeDriverManager().install(),
-                options=chrome_options
-            )
-            
-            # Execute anti-detection script
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
+            self.driver = get_driver_pool().acquire(self.browser_profile)
         except Exception as e:
             self.logger.error(f"Error setting up driver: {e}")
             raise
     
-    def can_apply_now(self) -> bool:
+    def release_driver(self):
+        """Return the application driver to the shared pool"""
+        if self.driver:
+            try:
+                get_driver_pool().release(self.driver)
+            except Exception as e:
+                self.logger.error(f"Error releasing driver: {e}")
+            finally:
+                self.driver = None
+    
+    def can_apply_now(self, source: Optional[str] = None) -> bool:
         """Check if we can apply to a job now based on rate limits"""
-        now = datetime.now()
-        
-        # Check daily limit
-        if self.applications_today >= self.config.MAX_JOBS_PER_DAY:
-            self.logger.info("Daily application limit reached")
-            return False
-        
-        # Check hourly limit
-        if self.applications_this_hour >= self.config.MAX_APPLICATIONS_PER_HOUR:
-            if self.last_application_time:
-                time_since_last = now - self.last_application_time
-                if time_since_last.total_seconds() < 3600:  # 1 hour
-                    self.logger.info("Hourly application limit reached")
-                    return False
-                else:
-                    # Reset hourly counter
-                    self.applications_this_hour = 0
-        
-        return True
+        return self.next_application_slot(source) <= time.time()
+    
+    def next_application_slot(self, source: Optional[str] = None) -> float:
+        """Epoch time this user can next apply (on ``source``, if given)"""
+        return self.rate_limiter.next_slot(self.user_id, source)
     
     def apply_to_job(self, job: Dict, user_profile: Dict) -> bool:
         """Apply to a specific job"""
+        slot = None
         try:
-            if not self.can_apply_now():
+            slot, free_at = self.rate_limiter.acquire(self.user_id, job.get('source'))
+            if slot is None:
+                self.logger.info(f"Application limit reached until {datetime.fromtimestamp(free_at):%Y-%m-%d %H:%M:%S}")
                 return False
             
-            # Generate personalized cover letter
-            cover_letter = self.profile_analyzer.generate_custom_cover_letter(user_profile, job)
+            # Use the letter written during discovery, generating one only if there isn't one
+            cover_letter = self._pregenerated_cover_letter(job, user_profile)
+            if not cover_letter:
+                cover_letter = self.profile_analyzer.generate_custom_cover_letter(user_profile, job)
             
             # Apply to job based on source
             success = False
@@ -150,12 +242,14 @@ class ApplicationAgent:
             else:
                 success = self._apply_to_generic_job(job, cover_letter)
             
+            # The browser goes back to the pool for the delay below and
+            # whatever scoring comes before the next application
+            self.release_driver()
+            
             if success:
                 # Update application tracking
                 self._record_application(job, user_profile, cover_letter)
-                self.applications_today += 1
-                self.applications_this_hour += 1
-                self.last_application_time = datetime.now()
+                slot = None  # Keep the slot
                 
                 self.logger.info(f"Successfully applied to {job['title']} at {job['company']}")
                 
@@ -171,6 +265,20 @@ class ApplicationAgent:
         except Exception as e:
             self.logger.error(f"Error applying to job {job['title']}: {e}")
             return False
+        finally:
+            self.release_driver()
+            # Only submitted applications count against the limits
+            if slot is not None:
+                self.rate_limiter.release(slot)
+    
+    def _pregenerated_cover_letter(self, job: Dict, user_profile: Dict) -> Optional[str]:
+        """Letter attached to the job or stored for it by the discovery cycle"""
+        if job.get('cover_letter'):
+            return job['cover_letter']
+        if not self.config.COVER_LETTER_PREGENERATE:
+            return None
+        job_key = job.get('job_key') or get_job_index().canonical_key(job)
+        return get_cover_letter_store().get(self.user_id, job_key, user_profile)
     
     def _apply_to_indeed_job(self, job: Dict, cover_letter: str) -> bool:
         """Apply to Indeed job"""
@@ -315,16 +423,13 @@ class ApplicationAgent:
     def _record_application(self, job: Dict, user_profile: Dict, cover_letter: str):
         """Record application in database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO applications 
-                (user_id, job_id, job_title, company, job_url, match_score, cover_letter)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            job_key = job.get('job_key') or get_job_index().canonical_key(job)
+            self.applied_jobs.add(self.user_id, job_key)
+            
+            # Written in batches by the recorder's thread, off the browser's
+            self.recorder.record((
                 self.user_id,
-                f"{job['title']}_{job['company']}",
+                job_key,
                 job['title'],
                 job['company'],
                 job['url'],
@@ -332,153 +437,138 @@ class ApplicationAgent:
                 cover_letter
             ))
             
-            conn.commit()
-            conn.close()
-            
         except Exception as e:
             self.logger.error(f"Error recording application: {e}")
     
-    def run_autonomous_application_cycle(self, user_profile: Dict, search_queries: List[str]):
-        """Run the main autonomous application cycle"""
+    def run_autonomous_application_cycle(self, user_profile: Dict, search_queries: List[str],
+                                         prefetched: Optional[Dict[str, List[Dict]]] = None) -> Optional[float]:
+        """Run the main autonomous application cycle.
+        
+        ``prefetched`` maps search queries to jobs already scraped for them,
+        e.g. by the scheduler's coalesced scrape; other queries are scraped.
+        Returns the time of the user's next free slot if the cycle stopped
+        on the application limits, or None if it ran out of jobs.
+        """
         try:
             self.logger.info("Starting autonomous application cycle")
             
-            # Reset daily counters if it's a new day
-            self._reset_daily_counters()
-            
-            # Scrape jobs from all sources
-            all_jobs = []
-            for query in search_queries:
-                jobs = self.job_scraper.scrape_all_sources(query, limit_per_source=10)
-                all_jobs.extend(jobs)
-                time.sleep(random.uniform(1, 3))
-            
-            # Remove duplicates
-            unique_jobs = []
-            seen = set()
-            for job in all_jobs:
-                key = f"{job['title']}_{job['company']}"
-                if key not in seen:
-                    seen.add(key)
-                    unique_jobs.append(job)
-            
-            # Calculate match scores and sort by relevance
-            scored_jobs = []
-            for job in unique_jobs:
-                match_score = self.profile_analyzer.calculate_job_match_score(user_profile, job)
-                job['match_score'] = match_score
-                
-                if match_score >= self.config.MIN_MATCH_SCORE:
-                    scored_jobs.append(job)
+            # Nothing to scrape or score for if no application could be sent
+            free_at = self.next_application_slot()
+            if free_at > time.time():
+                self.logger.info(f"Application limits reached until {datetime.fromtimestamp(free_at):%Y-%m-%d %H:%M:%S}")
+                return free_at
             
-            # Sort by match score (highest first)
-            scored_jobs.sort(key=lambda x: x['match_score'], reverse=True)
-            
-            self.logger.info(f"Found {len(scored_jobs)} jobs with match score >= {self.config.MIN_MATCH_SCORE}")
-            
-            # Apply to top matching jobs
+            # Score and apply to jobs as they stream in, while the remaining
+            # sources and queries are still being scraped
             applications_made = 0
-            for job in scored_jobs:
-                if not self.can_apply_now():
-                    self.logger.info("Application limits reached for this cycle")
-                    break
-                
-                if self.apply_to_job(job, user_profile):
-                    applications_made += 1
-                    self.logger.info(f"Applied to {job['title']} at {job['company']} (Score: {job['match_score']:.2f})")
-                
-                if applications_made >= self.config.MAX_JOBS_PER_DAY:
-                    self.logger.info("Daily application limit reached")
-                    break
-            
-            self.logger.info(f"Application cycle completed. Applied to {applications_made} jobs.")
+            matched_jobs = 0
+            jobs = self._iter_unique_jobs(search_queries, search_location(user_profile), prefetched)
+            try:
+                for job in self._iter_scored_jobs(user_profile, jobs):
+                    if job['match_score'] < self.config.MIN_MATCH_SCORE:
+                        continue
+                    matched_jobs += 1
+                    
+                    free_at = self.next_application_slot()
+                    if free_at > time.time():
+                        self.logger.info("Application limits reached for this cycle")
+                        return free_at
+                    
+                    # A source at its own limit doesn't hold up jobs from the others
+                    if not self.can_apply_now(job['source']):
+                        continue
+                    
+                    if self.apply_to_job(job, user_profile):
+                        applications_made += 1
+                        self.logger.info(f"Applied to {job['title']} at {job['company']} (Score: {job['match_score']:.2f})")
+            finally:
+                jobs.close()
+                self.job_scraper.close_driver()
+                self.logger.info(f"Found {matched_jobs} jobs with match score >= {self.config.MIN_MATCH_SCORE}")
+                self.logger.info(f"Application cycle completed. Applied to {applications_made} jobs.")
             
         except Exception as e:
             self.logger.error(f"Error in autonomous application cycle: {e}")
         finally:
-            if self.driver:
-                self.driver.quit()
+            self.release_driver()
+        return None
     
-    def _reset_daily_counters(self):
-        """Reset daily application counters"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            today = datetime.now().date()
-            
-            # Check if we have a record for today
-            cursor.execute('''
-                SELECT applications_count FROM application_limits 
-                WHERE user_id = ? AND date = ?
-            ''', (self.user_id, today))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                # Update existing record
-                cursor.execute('''
-                    UPDATE application_limits 
-                    SET applications_count = 0, last_application_time = NULL
-                    WHERE user_id = ? AND date = ?
-                ''', (self.user_id, today))
-            else:
-                # Create new record for today
-                cursor.execute('''
-                    INSERT INTO application_limits (user_id, date, applications_count)
-                    VALUES (?, ?, 0)
-                ''', (self.user_id, today))
-            
-            conn.commit()
-            conn.close()
-            
-            # Reset in-memory counters
-            self.applications_today = 0
-            self.applications_this_hour = 0
-            self.last_application_time = None
-            
-        except Exception as e:
-            self.logger.error(f"Error resetting daily counters: {e}")
+    def _iter_scored_jobs(self, user_profile: Dict, jobs):
+        """Score streamed jobs window by window, yielding each LLM-scored job with its match_score set"""
+        window_size = self.config.PRERANK_WINDOW if self.pre_ranker else self.config.SCORING_BATCH_SIZE
+        
+        window = []
+        for job in jobs:
+            window.append(job)
+            if len(window) >= window_size:
+                yield from self._score_jobs(user_profile, window)
+                window = []
+        
+        if window:
+            yield from self._score_jobs(user_profile, window)
+    
+    def _score_jobs(self, user_profile: Dict, jobs: List[Dict]) -> List[Dict]:
+        """LLM-score the jobs the local pre-ranker considers plausible matches"""
+        if self.pre_ranker:
+            jobs = self.pre_ranker.select(user_profile, jobs)
+        
+        scores = self.profile_analyzer.score_jobs_batch(user_profile, jobs)
+        for job, score in zip(jobs, scores):
+            job['match_score'] = score
+        return jobs
+    
+    def _iter_unique_jobs(self, search_queries: List[str], location: str,
+                          prefetched: Optional[Dict[str, List[Dict]]] = None):
+        """Stream scraped jobs for every query, skipping duplicates and jobs already applied to"""
+        seen: Set[str] = set()
+        prefetched = prefetched or {}
+        for query in search_queries:
+            if query in prefetched:
+                yield from (job for job in prefetched[query] if self._is_new_job(job, seen))
+                continue
+            for job in self.job_scraper.iter_jobs(query, location, limit_per_source=10):
+                if self._is_new_job(job, seen):
+                    yield job
+            time.sleep(random.uniform(1, 3))
+    
+    def _is_new_job(self, job: Dict, seen: Set[str]) -> bool:
+        """Whether a job is neither a duplicate of one seen this cycle nor already applied to"""
+        key = get_job_index().assign_key(job)
+        if key in seen:
+            return False
+        seen.add(key)
+        # Dropped before any scoring or cover letter work is spent on it
+        return bool(self.applied_jobs.filter_new(self.user_id, [job]))
     
     def get_application_stats(self) -> Dict:
         """Get application statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Today's applications
-            today = datetime.now().date()
-            cursor.execute('''
-                SELECT COUNT(*) FROM applications 
-                WHERE user_id = ? AND DATE(applied_at) = ?
-            ''', (self.user_id, today))
-            
-            today_count = cursor.fetchone()[0]
-            
-            # Total applications
-            cursor.execute('''
-                SELECT COUNT(*) FROM applications WHERE user_id = ?
-            ''', (self.user_id,))
-            
-            total_count = cursor.fetchone()[0]
-            
-            # Response rate
-            cursor.execute('''
-                SELECT COUNT(*) FROM applications 
-                WHERE user_id = ? AND response_received = TRUE
-            ''', (self.user_id,))
-            
-            responses = cursor.fetchone()[0]
+            # Count applications still waiting in the write-behind queue
+            try:
+                self.recorder.flush()
+            except RuntimeError as e:
+                self.logger.warning(f"Application stats may be incomplete: {e}")
+            
+            # One pass over the user's daily summary rows; applied_at is
+            # stored in UTC, so "today" is the UTC date
+            today = datetime.now(timezone.utc).date().isoformat()
+            today_count, total_count, responses = self.storage.fetchone('''
+                SELECT
+                    COALESCE(SUM(CASE WHEN day = ? THEN applications ELSE 0 END), 0),
+                    COALESCE(SUM(applications), 0),
+                    COALESCE(SUM(responses), 0)
+                FROM application_daily_stats
+                WHERE user_id = ?
+            ''', (today, self.user_id))
             response_rate = (responses / total_count * 100) if total_count > 0 else 0
             
-            conn.close()
-            
             return {
                 "applications_today": today_count,
                 "total_applications": total_count,
                 "response_rate": round(response_rate, 2),
                 "daily_limit": self.config.MAX_JOBS_PER_DAY,
-                "hourly_limit": self.config.MAX_APPLICATIONS_PER_HOUR
+                "hourly_limit": self.config.MAX_APPLICATIONS_PER_HOUR,
+                "next_application_slot": datetime.fromtimestamp(self.next_application_slot()).strftime("%Y-%m-%d %H:%M:%S")
             }
             
         except Exception as e:
@@ -487,7 +577,10 @@ class ApplicationAgent:
     
     def close(self):
         """Cleanup resources"""
-        if self.driver:
-            self.driver.quit()
+        try:
+            self.recorder.flush(durable=True)
+        except RuntimeError as e:
+            self.logger.error(f"Error flushing application records: {e}")
+        self.release_driver()
         if self.job_scraper:
             self.job_scraper.close_driver()
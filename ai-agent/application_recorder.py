@@ -0,0 +1,153 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+from config import Config
+from storage import SQLiteStorage, get_storage
+
+INSERT_APPLICATION = '''
+    INSERT OR IGNORE INTO applications
+    (user_id, job_id, job_title, company, job_url, match_score, cover_letter)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+_STOP = object()
+_FLUSH = object()
+
+class ApplicationRecorder:
+    """Write-behind recorder for submitted applications.
+
+    ``record`` only puts the row on a bounded queue. One writer thread drains
+    it and inserts rows with ``executemany`` in a single transaction once
+    ``batch_size`` rows are waiting or the oldest has waited ``flush_interval``
+    seconds, so a burst of applications costs one commit instead of one each.
+    ``flush`` waits until everything queued so far is written, and ``close``
+    flushes, checkpoints the WAL to disk and stops the writer. A second row
+    for the same user and job is dropped by the unique index. Rows whose
+    write keeps failing are held and retried with backoff, never dropped,
+    and ``flush`` raises while any are outstanding.
+    """
+
+    def __init__(self, storage: Optional[SQLiteStorage] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_queue: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.storage = storage or get_storage()
+        self.batch_size = batch_size or self.config.APPLICATION_RECORD_BATCH_SIZE
+        self.flush_interval = flush_interval or self.config.APPLICATION_RECORD_FLUSH_MS / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue or self.config.APPLICATION_RECORD_QUEUE_SIZE)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._unwritten: List[Tuple] = []  # Rows whose write failed, retried with backoff
+        self._retry_delay = self.flush_interval
+        self._retry_at = 0.0
+        self._writer = threading.Thread(target=self._run, name="application-recorder", daemon=True)
+        self._writer.start()
+
+    def record(self, row: Tuple):
+        """Queue one ``applications`` row; only blocks if the writer is a full queue behind"""
+        if self._closed:
+            raise RuntimeError("Application recorder is closed")
+        self._queue.put(row)
+
+    def flush(self, durable: bool = False):
+        """Wait until every queued row is committed, and checkpoint the WAL if ``durable``.
+
+        Raises RuntimeError if some rows still couldn't be written; they're
+        kept and retried, not dropped.
+        """
+        if self._closed:
+            return
+        # Have the writer commit what it's holding now instead of at its deadline
+        self._queue.put(_FLUSH)
+        self._queue.join()
+        with self._lock:
+            unwritten = len(self._unwritten)
+        if unwritten:
+            raise RuntimeError(f"{unwritten} recorded applications are not written yet")
+        if durable:
+            self._checkpoint()
+
+    def close(self):
+        """Write everything still queued, make it durable and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        if self._unwritten:
+            self.logger.error(f"Closing with {len(self._unwritten)} recorded applications not written")
+        self._checkpoint()
+
+    def _run(self):
+        batch: List[Tuple] = []
+        deadline = 0.0
+        while True:
+            due = ([deadline] if batch else []) + ([self._retry_at] if self._unwritten else [])
+            timeout = max(0.0, min(due) - time.monotonic()) if due else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._write(batch)
+                self._queue.task_done()
+                return
+            if item is _FLUSH:
+                self._write(batch)
+                batch = []
+                self._queue.task_done()
+                continue
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if (batch or self._unwritten) and (item is None or len(batch) >= self.batch_size):
+                self._write(batch)
+                batch = []
+
+    def _write(self, batch: List[Tuple]):
+        """Commit ``batch`` along with any rows earlier writes failed on"""
+        with self._lock:
+            rows, self._unwritten = self._unwritten + batch, []
+        if rows:
+            for attempt in range(3):
+                try:
+                    with self.storage.transaction() as conn:
+                        conn.executemany(INSERT_APPLICATION, rows)
+                    self._retry_delay = self.flush_interval
+                    break
+                except Exception as e:
+                    self.logger.error(f"Error recording {len(rows)} applications (attempt {attempt + 1}): {e}")
+                    time.sleep(self.flush_interval)
+            else:
+                # Keep the rows and try again later, backing off up to a minute
+                with self._lock:
+                    self._unwritten = rows + self._unwritten
+                self._retry_at = time.monotonic() + self._retry_delay
+                self._retry_delay = min(self._retry_delay * 2, 60.0)
+        for _ in batch:
+            self._queue.task_done()
+
+    def _checkpoint(self):
+        # synchronous=NORMAL only syncs the WAL at checkpoints
+        try:
+            self.storage.execute('PRAGMA wal_checkpoint(FULL)')
+        except Exception as e:
+            self.logger.warning(f"Error checkpointing application records: {e}")
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+def get_application_recorder() -> ApplicationRecorder:
+    """Return the process-wide application recorder, flushed on exit"""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = ApplicationRecorder()
+            atexit.register(_recorder.close)
+        return _recorder
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+from config import Config
+from storage import get_storage
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, sized for ``capacity`` keys at ``fp_rate``"""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def is_full(self) -> bool:
+        return self.count > self.capacity
+
+class AppliedJobFilter:
+    """Which canonical job keys each user has already applied to.
+
+    Every user's submitted job keys are held in a Bloom filter, loaded from
+    ``applications`` once and updated as applications are recorded, so the
+    common "never applied" answer costs a few bit lookups. A positive is
+    confirmed against this process's recent applications and then the
+    ``(user_id, job_id)`` unique index, so a false positive never hides a
+    new job. The index is also what stops a duplicate row being written.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or self.config.SQLITE_DB
+        self.fp_rate = self.config.APPLIED_FILTER_FALSE_POSITIVE_RATE
+        self.min_capacity = self.config.APPLIED_FILTER_MIN_CAPACITY
+
+        self._lock = threading.Lock()
+        self._filters: Dict[str, BloomFilter] = {}
+        self._recent: Dict[str, Set[str]] = {}  # user_id -> keys recorded by this process
+        self._stats = {'skipped': 0, 'false_positives': 0}
+        self.storage = get_storage(self.db_path)
+
+    def load(self, user_ids: Iterable[str]) -> int:
+        """Build the filters for ``user_ids`` from their recorded applications in one query"""
+        user_ids = [user_id for user_id in set(user_ids) if user_id not in self._filters]
+        keys: Dict[str, List[str]] = {user_id: [] for user_id in user_ids}
+        try:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                for user_id, job_key in self.storage.fetchall(f'''
+                    SELECT user_id, job_id FROM applications
+                    WHERE user_id IN ({",".join("?" * len(chunk))})
+                ''', chunk):
+                    keys[user_id].append(job_key)
+        except Exception as e:
+            self.logger.warning(f"Error loading applied jobs: {e}")
+            return 0
+
+        with self._lock:
+            for user_id, user_keys in keys.items():
+                self._filters.setdefault(user_id, self._build(user_keys))
+        return sum(len(user_keys) for user_keys in keys.values())
+
+    def has_applied(self, user_id: str, job_key: str) -> bool:
+        """Whether the user has already applied to the job with this canonical key"""
+        if user_id not in self._filters:
+            self.load([user_id])
+
+        with self._lock:
+            bloom = self._filters.get(user_id)
+            if bloom is None or job_key not in bloom:
+                return False
+            if job_key in self._recent.get(user_id, ()):
+                return True
+
+        try:
+            row = self.storage.fetchone('''
+                SELECT 1 FROM applications WHERE user_id = ? AND job_id = ?
+            ''', (user_id, job_key))
+        except Exception as e:
+            self.logger.warning(f"Error checking applied job: {e}")
+            return False
+        if row is None:
+            with self._lock:
+                self._stats['false_positives'] += 1
+        return row is not None
+
+    def filter_new(self, user_id: str, jobs: Iterable[Dict]) -> List[Dict]:
+        """The jobs, tagged with ``job_key``, this user hasn't applied to yet"""
+        jobs = list(jobs)
+        new_jobs = [job for job in jobs if not self.has_applied(user_id, job['job_key'])]
+        if len(new_jobs) < len(jobs):
+            with self._lock:
+                self._stats['skipped'] += len(jobs) - len(new_jobs)
+        return new_jobs
+
+    def add(self, user_id: str, job_key: str):
+        """Mark a job as applied to; called when the application is recorded"""
+        if user_id not in self._filters:
+            self.load([user_id])
+
+        with self._lock:
+            self._recent.setdefault(user_id, set()).add(job_key)
+            bloom = self._filters.get(user_id)
+            if bloom is None:
+                return
+            bloom.add(job_key)
+            full = bloom.is_full()
+
+        if full:
+            # Past capacity the false-positive rate climbs; rebuild at twice the size
+            self._rebuild(user_id)
+
+    def forget_user(self, user_id: str):
+        """Drop a user's in-memory filter"""
+        with self._lock:
+            self._filters.pop(user_id, None)
+            self._recent.pop(user_id, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['users'] = len(self._filters)
+            stats['keys'] = sum(bloom.count for bloom in self._filters.values())
+        return stats
+
+    def _rebuild(self, user_id: str):
+        try:
+            rows = self.storage.fetchall('SELECT job_id FROM applications WHERE user_id = ?', (user_id,))
+        except Exception as e:
+            self.logger.warning(f"Error rebuilding applied jobs filter: {e}")
+            return
+        with self._lock:
+            # Recent applications may still be queued for writing
+            keys = {row[0] for row in rows} | self._recent.get(user_id, set())
+            self._filters[user_id] = self._build(list(keys))
+
+    def _build(self, keys: List[str]) -> BloomFilter:
+        bloom = BloomFilter(max(self.min_capacity, 2 * len(keys)), self.fp_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+_filter = None
+_filter_lock = threading.Lock()
+
+def get_applied_jobs() -> AppliedJobFilter:
+    """Return the process-wide already-applied filter"""
+    global _filter
+    with _filter_lock:
+        if _filter is None:
+            _filter = AppliedJobFilter()
+        return _filter
@@ -11,6 +11,7 @@ class Config:
     # Job Application Limits
     MAX_JOBS_PER_DAY = 100
     MAX_APPLICATIONS_PER_HOUR = 10
+    MAX_APPLICATIONS_PER_SOURCE_PER_HOUR = {"linkedin_india": 5}  # Per user, within the hourly limit; keyed by scraper source id
     MIN_MATCH_SCORE = 0.7
     
     # AI Model Settings
@@ -18,29 +19,144 @@ class Config:
     MAX_TOKENS = 1000
     TEMPERATURE = 0.3
     
+    # LLM Response Cache (shared by every ProfileAnalyzer in the process)
+    LLM_CACHE_ENABLED = True
+    LLM_CACHE_TTL = 7 * 24 * 3600  # Seconds a cached completion stays valid
+    LLM_CACHE_MAX_MEMORY_ENTRIES = 5000  # In-memory LRU tier
+    LLM_CACHE_MAX_ROWS = 100000  # SQLite tier, least recently used rows evicted first
+    
+    # Profile Analysis Cache (one analysis per distinct profile, kept in SQLite)
+    PROFILE_ANALYSIS_VERSION = 1  # Bump when the analysis prompt or schema changes
+    PROFILE_ANALYSIS_MAX_MEMORY_ENTRIES = 10000  # In-memory LRU tier
+    
+    # LLM Client
+    LLM_ASYNC_ENABLED = True  # Send scoring batches concurrently on the async client
+    LLM_MAX_CONCURRENCY = 8  # Requests in flight per event loop
+    LLM_REQUESTS_PER_MINUTE = 500  # Provider RPM limit, shared process-wide
+    LLM_TOKENS_PER_MINUTE = 160000  # Provider TPM limit, shared process-wide
+    LLM_REQUEST_TIMEOUT = 30  # Seconds per call
+    LLM_MAX_RETRIES = 5  # Retries on 429s, timeouts and server errors
+    LLM_BACKOFF_BASE = 1.0  # Seconds; doubles per retry, with full jitter
+    LLM_BACKOFF_MAX = 30.0
+    
+    # Batched Job Scoring
+    SCORING_BATCH_SIZE = 20  # Most jobs scored in one LLM request
+    SCORING_BATCH_TOKEN_BUDGET = 3000  # Prompt tokens per batch, user profile included
+    
+    # Cover Letters (pre-generated during discovery, reused for near-identical postings)
+    COVER_LETTER_PREGENERATE = True
+    COVER_LETTER_PREGENERATE_TOP_N = 5  # Best-matching discovered jobs per user
+    COVER_LETTER_TOKEN_BUDGET = 10000  # Estimated tokens per user per discovery cycle
+    COVER_LETTER_TTL_DAYS = 7  # Letters for postings older than this are dropped
+    COVER_LETTER_REUSE = True  # Re-render a user's letter for near-identical postings
+    COVER_LETTER_REUSE_MIN_SIMILARITY = 0.8  # Posting similarity (skills, experience, description); same company and title required
+    
     # Job Search Parameters
     SEARCH_DELAY_MIN = 2
     SEARCH_DELAY_MAX = 5
     APPLICATION_DELAY_MIN = 30
     APPLICATION_DELAY_MAX = 120
     
+    # Scraping Concurrency
+    PARALLEL_SCRAPING = True  # Run each source on its own worker and browser
+    MAX_SCRAPER_WORKERS = 3
+    MAX_PAGES_PER_SOURCE = 3  # Result pages followed per source until its limit is met
+    
+    # Fetch strategy per source: "http" uses the pooled HTTP client and only
+    # falls back to Selenium when it comes back empty, "browser" always uses Selenium
+    SOURCE_FETCH_STRATEGIES = {
+        "naukri": "browser",
+        "indeed_india": "browser",
+        "linkedin_india": "http",
+        "remoteok": "http"
+    }
+    HTTP_TIMEOUT = 15
+    HTTP_POOL_CONNECTIONS = 10
+    HTTP_POOL_MAXSIZE = 20
+    
+    # Scrape Result Cache
+    SCRAPE_CACHE_ENABLED = True
+    SCRAPE_CACHE_TTL = 1800  # Seconds a (source, query, location) scrape stays fresh
+    SCRAPE_CACHE_MAX_ENTRIES = 1000  # In-memory LRU tier; SQLite holds the rest
+    
+    # Job Deduplication
+    JOB_INDEX_PERSISTENT = True  # Keep the dedup corpus in SQLite across runs
+    JOB_INDEX_RETENTION_DAYS = 60  # Postings older than this are dropped on load
+    JOB_DEDUP_MIN_SIMILARITY = 0.7  # Company-name trigram similarity for near-duplicates
+    
     # Profile Matching Weights
     SKILLS_WEIGHT = 0.4
     EXPERIENCE_WEIGHT = 0.3
     LOCATION_WEIGHT = 0.2
     SALARY_WEIGHT = 0.1
     
+    # Local Pre-Ranking (cheap vectorized scoring ahead of the LLM)
+    PRERANK_ENABLED = True
+    PRERANK_WINDOW = 50  # Streamed jobs pre-ranked together
+    PRERANK_TOP_K = 20  # Jobs per window passed on to the LLM
+    PRERANK_MIN_SCORE = MIN_MATCH_SCORE * 0.5  # Local score below which a job can't plausibly match
+    
+    # Match Engine (all users against the shared job corpus)
+    MATCH_ROLE_WEIGHT = 0.3  # Title vs preferred roles, alongside SKILLS_WEIGHT and LOCATION_WEIGHT
+    MATCH_ENGINE_TOP_K = 50  # Candidates per user for each discovery cycle
+    MATCH_ENGINE_MIN_SCORE = 0.2
+    MATCH_ENGINE_MAX_JOBS = 100000  # Oldest jobs are dropped beyond this
+    MATCH_ENGINE_USER_CHUNK = 256  # Users scored per matrix product
+    MATCH_ENGINE_CORPUS_FILE = ".match_corpus.jsonl"  # Written by save() and reloaded on start
+    
+    # Job Vector Index (approximate nearest-neighbour candidate retrieval)
+    ANN_ENABLED = True
+    ANN_INDEX_DIR = ".job_vectors"
+    ANN_DIMENSIONS = 128
+    ANN_LISTS = 1024  # k-means clusters; capped at corpus size / 39
+    ANN_PROBES = 8  # Clusters scanned per query
+    ANN_MIN_TRAIN_SIZE = 10000  # Exact scan below this many vectors
+    ANN_RETRAIN_GROWTH = 4  # Re-cluster once the corpus grows this many times over
+    ANN_TRAIN_ITERATIONS = 10
+    ANN_MIN_CORPUS = 50000  # Match engine switches from a full scan to the index here
+    ANN_CANDIDATES = 200  # Postings fetched from the index per user and rescored exactly
+    
+    # Embedding Store (memory-mapped job and profile vectors, shared across processes)
+    EMBEDDING_STORE_ENABLED = True
+    EMBEDDING_STORE_DIR = ".embeddings"
+    EMBEDDING_STORE_DTYPE = "float16"  # "float32" for full precision at twice the size
+    
     # Browser Settings
     HEADLESS_MODE = True
     USER_AGENT_ROTATION = True
     PROXY_ROTATION = False
     
+    # WebDriver Pool (shared by scrapers and application agents)
+    DRIVER_POOL_SIZE = 4  # Upper bound on Chrome processes per process
+    DRIVER_POOL_MIN_IDLE = 1  # Warm browsers kept ready for checkout
+    DRIVER_MAX_PAGE_LOADS = 200  # Recycle a browser after this many page loads
+    DRIVER_ACQUIRE_TIMEOUT = 600  # Seconds to wait for a free browser
+    
+    # Browser profiles: "lean" blocks images, CSS, fonts, media and trackers and
+    # loads pages eagerly; "default" is a regular full browser
+    SCRAPER_BROWSER_PROFILE = "lean"
+    APPLICATION_BROWSER_PROFILE = "default"
+    BROWSER_DISK_CACHE_DIR = ".browser_cache"
+    BROWSER_DISK_CACHE_SIZE = 100 * 1024 * 1024  # Bytes per browser
+    
     # Logging
     LOG_LEVEL = "INFO"
     LOG_FILE = "ai_agent.log"
     
     # Database
     SQLITE_DB = "ai_agent.db"
+    SQLITE_BUSY_TIMEOUT = 10  # Seconds a statement waits on another writer's lock
+    SQLITE_BUSY_RETRIES = 5  # Retries with backoff once the busy timeout runs out
+    SQLITE_CACHED_STATEMENTS = 256  # Compiled statements kept per connection
+    
+    # Application Recording (write-behind, off the browser thread)
+    APPLICATION_RECORD_BATCH_SIZE = 50  # Rows per executemany transaction
+    APPLICATION_RECORD_FLUSH_MS = 500  # Longest a recorded application waits to be written
+    APPLICATION_RECORD_QUEUE_SIZE = 10000  # Recording blocks only when this many are pending
+    
+    # Already-Applied Filter (per-user Bloom filters over submitted job keys)
+    APPLIED_FILTER_FALSE_POSITIVE_RATE = 0.001  # Positives are confirmed against the unique index
+    APPLIED_FILTER_MIN_CAPACITY = 1000  # Keys sized for per user; filters are rebuilt at twice the size when full
     
     # Job Sources
     JOB_SOURCES = [
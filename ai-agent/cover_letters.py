@@ -0,0 +1,286 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+from config import Config
+from storage import get_storage
+from job_dedup import NON_ALNUM, minhash, normalize_company, title_key
+
+# Job fields a reused letter is re-rendered with. Placeholders use NUL so they
+# can't collide with anything a letter contains.
+TEMPLATE_FIELDS = ('title', 'company', 'location', 'city')
+
+# Shorter field values are left in the letter; they're too likely to be part
+# of an ordinary word or a different name
+MIN_TEMPLATE_VALUE_LENGTH = 3
+
+def _slot(field: str) -> str:
+    return f"\x00{field}\x00"
+
+def _field_values(job: Dict) -> Dict[str, str]:
+    location = (job.get('location') or '').strip()
+    return {
+        'title': (job.get('title') or '').strip(),
+        'company': (job.get('company') or '').strip(),
+        'location': location,
+        'city': location.split(',')[0].strip()
+    }
+
+def make_template(letter: str, job: Dict) -> str:
+    """Replace the job's title, company and location in a letter with placeholders"""
+    values = _field_values(job)
+    # Longest first, so "Mumbai, Maharashtra" is replaced before "Mumbai"
+    for field in sorted(TEMPLATE_FIELDS, key=lambda name: len(values[name]), reverse=True):
+        if len(values[field]) >= MIN_TEMPLATE_VALUE_LENGTH:
+            # Whole words only, so "Sol" doesn't match inside "solar"
+            pattern = rf"(?<!\w){re.escape(values[field])}(?!\w)"
+            letter = re.sub(pattern, lambda _: _slot(field), letter, flags=re.IGNORECASE)
+    return letter
+
+def render_template(template: str, job: Dict) -> str:
+    """Fill a template's placeholders in with another job's fields"""
+    for field, value in _field_values(job).items():
+        template = template.replace(_slot(field), value)
+    return template
+
+def template_group(job: Dict) -> Tuple[str, str]:
+    """Normalized company and title; only postings in the same group share letters"""
+    return normalize_company(job.get('company', '')), title_key(job.get('title', ''))
+
+def _normalize(text: str) -> str:
+    return NON_ALNUM.sub(' ', str(text or '').lower()).strip()
+
+def posting_signature(job: Dict) -> Tuple[int, ...]:
+    """MinHash over what the scrapers capture of a posting, location aside.
+
+    Features are the normalized title and company, each skill tag, the
+    experience and job type, and word trigrams of a description or
+    requirements where a source provides them. Empty for a job with none.
+    """
+    features = {f"t:{word}" for word in title_key(job.get('title', '')).split()}
+    company = normalize_company(job.get('company', ''))
+    if company:
+        features.add(f"c:{company}")
+    skills = job.get('skills') or []
+    for skill in skills if isinstance(skills, list) else str(skills).split(','):
+        if _normalize(skill):
+            features.add(f"k:{_normalize(skill)}")
+    for field in ('experience', 'job_type'):
+        if _normalize(job.get(field)):
+            features.add(f"{field}:{_normalize(job.get(field))}")
+    for field in ('description', 'requirements'):
+        value = job.get(field)
+        words = _normalize(" ".join(map(str, value)) if isinstance(value, list) else value).split()
+        if words:
+            features.update(f"d:{' '.join(words[i:i + 3])}" for i in range(max(1, len(words) - 2)))
+    return minhash(features) if features else ()
+
+def signature_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two postings' features"""
+    if not a or not b:
+        # Nothing to compare, so there's no telling the postings apart
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+class CoverLetterStore:
+    """Cover letters generated ahead of time, per user and job.
+
+    Each letter records a hash of the profile it was written from and an
+    expiry time. A lookup only returns a letter for the same profile that
+    hasn't expired; anything else is deleted on sight, and ``purge_expired``
+    and ``evict_user`` clear out the rest.
+
+    Every generated letter is also kept as a template with the job's title,
+    company and location swapped for placeholders. ``find_similar`` renders
+    a template for a new posting from the same company with the same title
+    and near-identical skills, experience and description, which is how one
+    role posted in several cities or on several sources gets a single LLM
+    call.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl_days: Optional[float] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or self.config.SQLITE_DB
+        self.ttl = (ttl_days or self.config.COVER_LETTER_TTL_DAYS) * 86400
+        self.min_similarity = self.config.COVER_LETTER_REUSE_MIN_SIMILARITY
+
+        self._lock = threading.Lock()
+        self._stats = {'reused': 0, 'generated': 0}
+        self.storage = get_storage(self.db_path)
+        self._setup_database()
+
+    @staticmethod
+    def profile_key(profile: Dict) -> str:
+        """Hash of everything in the profile a letter can draw on"""
+        payload = json.dumps(profile, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, user_id: str, job_key: str, profile: Dict) -> Optional[str]:
+        """The stored letter for this user, job and profile, or None"""
+        try:
+            row = self.storage.fetchone('''
+                SELECT cover_letter, profile_hash, expires_at FROM cover_letters
+                WHERE user_id = ? AND job_key = ?
+            ''', (user_id, job_key))
+            if row and (row[1] != self.profile_key(profile) or row[2] < time.time()):
+                self.storage.execute('DELETE FROM cover_letters WHERE user_id = ? AND job_key = ?', (user_id, job_key))
+                row = None
+        except Exception as e:
+            self.logger.warning(f"Error reading cover letter: {e}")
+            return None
+        return row[0] if row else None
+
+    def stored_jobs(self, user_id: str, profile: Dict) -> Set[str]:
+        """Job keys that already have a current letter for this profile"""
+        try:
+            rows = self.storage.fetchall('''
+                SELECT job_key FROM cover_letters
+                WHERE user_id = ? AND profile_hash = ? AND expires_at >= ?
+            ''', (user_id, self.profile_key(profile), time.time()))
+        except Exception as e:
+            self.logger.warning(f"Error reading stored cover letters: {e}")
+            return set()
+        return {row[0] for row in rows}
+
+    def put_many(self, user_id: str, profile: Dict, letters: Dict[str, str]):
+        """Store letters by job key, replacing older ones"""
+        if not letters:
+            return
+        now = time.time()
+        profile_hash = self.profile_key(profile)
+        try:
+            with self.storage.transaction() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO cover_letters
+                    (user_id, job_key, profile_hash, cover_letter, created_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [(user_id, job_key, profile_hash, letter, now, now + self.ttl)
+                      for job_key, letter in letters.items()])
+        except Exception as e:
+            self.logger.warning(f"Error storing cover letters: {e}")
+
+    def find_similar(self, user_id: str, profile: Dict, job: Dict) -> Optional[str]:
+        """A letter this user already has for a near-identical posting, re-rendered for ``job``"""
+        signature = posting_signature(job)
+        if not signature:
+            return None
+        try:
+            rows = self.storage.fetchall('''
+                SELECT signature, template FROM cover_letter_templates
+                WHERE user_id = ? AND profile_hash = ? AND company = ? AND title_key = ? AND created_at >= ?
+                ORDER BY created_at DESC
+            ''', (user_id, self.profile_key(profile), *template_group(job), time.time() - self.ttl))
+        except Exception as e:
+            self.logger.warning(f"Error reading cover letter templates: {e}")
+            return None
+
+        for stored_signature, template in rows:
+            if signature_similarity(signature, tuple(json.loads(stored_signature))) >= self.min_similarity:
+                with self._lock:
+                    self._stats['reused'] += 1
+                return render_template(template, job)
+        return None
+
+    def add_template(self, user_id: str, profile: Dict, job: Dict, letter: str):
+        """Keep a newly generated letter so near-identical postings can reuse it"""
+        with self._lock:
+            self._stats['generated'] += 1
+        signature = posting_signature(job)
+        if not signature:
+            return
+        try:
+            self.storage.execute('''
+                INSERT INTO cover_letter_templates
+                (user_id, profile_hash, company, title_key, signature, template, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, self.profile_key(profile), *template_group(job),
+                  json.dumps(signature), make_template(letter, job), time.time()))
+        except Exception as e:
+            self.logger.warning(f"Error storing cover letter template: {e}")
+
+    def get_stats(self) -> Dict:
+        """How many letters were reused versus generated, and the reuse hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats['reused'] + stats['generated']
+        stats['hit_rate'] = round(stats['reused'] / total, 4) if total else 0.0
+        return stats
+
+    def evict_user(self, user_id: str, keep_profile: Optional[Dict] = None) -> int:
+        """Delete a user's letters and templates, except those written from ``keep_profile``"""
+        try:
+            with self.storage.transaction() as conn:
+                deleted = 0
+                for table in ('cover_letters', 'cover_letter_templates'):
+                    if keep_profile is None:
+                        cursor = conn.execute(f'DELETE FROM {table} WHERE user_id = ?', (user_id,))
+                    else:
+                        cursor = conn.execute(f'''
+                            DELETE FROM {table} WHERE user_id = ? AND profile_hash != ?
+                        ''', (user_id, self.profile_key(keep_profile)))
+                    deleted += cursor.rowcount
+            return deleted
+        except Exception as e:
+            self.logger.warning(f"Error evicting cover letters: {e}")
+            return 0
+
+    def purge_expired(self) -> int:
+        """Delete letters whose job has aged out"""
+        try:
+            with self.storage.transaction() as conn:
+                cursor = conn.execute('DELETE FROM cover_letters WHERE expires_at < ?', (time.time(),))
+                conn.execute('DELETE FROM cover_letter_templates WHERE created_at < ?', (time.time() - self.ttl,))
+            return cursor.rowcount
+        except Exception as e:
+            self.logger.warning(f"Error purging cover letters: {e}")
+            return 0
+
+    def _setup_database(self):
+        try:
+            with self.storage.transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cover_letters (
+                        user_id TEXT NOT NULL,
+                        job_key TEXT NOT NULL,
+                        profile_hash TEXT NOT NULL,
+                        cover_letter TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (user_id, job_key)
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_cover_letters_expires ON cover_letters (expires_at)')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cover_letter_templates (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id TEXT NOT NULL,
+                        profile_hash TEXT NOT NULL,
+                        company TEXT NOT NULL,
+                        title_key TEXT NOT NULL,
+                        signature TEXT NOT NULL,
+                        template TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_cover_letter_templates_lookup
+                    ON cover_letter_templates (user_id, profile_hash, company, title_key)
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_cover_letter_templates_created ON cover_letter_templates (created_at)')
+        except Exception as e:
+            self.logger.error(f"Error setting up cover letter table: {e}")
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_cover_letter_store() -> CoverLetterStore:
+    """Return the process-wide cover letter store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CoverLetterStore()
+        return _store
@@ -0,0 +1,341 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from fake_useragent import UserAgent
+from config import Config
+
+# Browser profiles a driver can be checked out with
+PROFILE_DEFAULT = "default"
+PROFILE_LEAN = "lean"
+BROWSER_PROFILES = (PROFILE_DEFAULT, PROFILE_LEAN)
+
+# Content settings the lean profile turns off (2 = block)
+LEAN_CONTENT_SETTINGS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.stylesheets": 2,
+    "profile.managed_default_content_settings.plugins": 2,
+    "profile.managed_default_content_settings.popups": 2,
+    "profile.managed_default_content_settings.geolocation": 2,
+    "profile.managed_default_content_settings.notifications": 2,
+    "profile.managed_default_content_settings.media_stream": 2
+}
+
+# Requests the lean profile drops through CDP Network.setBlockedURLs: images,
+# fonts, stylesheets and media the preferences above don't fully cover, plus
+# common analytics and ad hosts
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.mp3", "*.m3u8", "*.ogg",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*connect.facebook.com*",
+    "*hotjar.com*", "*clarity.ms*", "*bat.bing.com*", "*scorecardresearch.com*",
+    "*adservice.google.*", "*snap.licdn.com*", "*px.ads.linkedin.com*",
+    "*newrelic.com*", "*nr-data.net*", "*segment.io*", "*mixpanel.com*"
+]
+
+class PooledDriver:
+    """Thin wrapper around a Chrome WebDriver that tracks usage for the pool"""
+
+    def __init__(self, driver, profile: str, slot: int):
+        self._driver = driver
+        self.profile = profile
+        self.slot = slot
+        self.page_loads = 0
+        self.origins: Set[str] = set()  # Origins loaded since the last reset, for clearing their storage
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+    @property
+    def raw(self):
+        """The underlying selenium WebDriver"""
+        return self._driver
+
+    def get(self, url: str):
+        """Load a page, counting it towards the recycle threshold"""
+        self.page_loads += 1
+        self.origins.add(_origin(url))
+        return self._driver.get(url)
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+class DriverPool:
+    """Process-wide pool of Chrome drivers with checkout/return semantics.
+
+    The pool never holds more than ``max_size`` browsers across all profiles,
+    keeps ``min_idle`` warm instances ready, health-checks drivers on checkout
+    and recycles them after ``max_page_loads`` page loads. When the pool is
+    full and only drivers of another profile are idle, one of them is retired
+    to make room.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, min_idle: Optional[int] = None,
+                 max_page_loads: Optional[int] = None, acquire_timeout: Optional[float] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.max_size = max_size or self.config.DRIVER_POOL_SIZE
+        self.min_idle = min(min_idle if min_idle is not None else self.config.DRIVER_POOL_MIN_IDLE, self.max_size)
+        self.max_page_loads = max_page_loads or self.config.DRIVER_MAX_PAGE_LOADS
+        self.acquire_timeout = acquire_timeout or self.config.DRIVER_ACQUIRE_TIMEOUT
+
+        self._cond = threading.Condition()
+        self._idle: List[PooledDriver] = []
+        self._free_slots = set(range(self.max_size))
+        self._closed = False
+        self._ua = None
+        self._stats = {'created': 0, 'reused': 0, 'recycled': 0, 'unhealthy': 0, 'evicted': 0}
+
+    def acquire(self, profile: str = PROFILE_DEFAULT, timeout: Optional[float] = None) -> PooledDriver:
+        """Check out a healthy driver of ``profile``, creating one if the pool has room"""
+        if profile not in BROWSER_PROFILES:
+            raise ValueError(f"Unknown browser profile: {profile}")
+
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            driver = None
+            evicted = None
+            slot = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+
+                    matching = [d for d in self._idle if d.profile == profile]
+                    if matching:
+                        driver = matching[-1]
+                        self._idle.remove(driver)
+                        break
+                    if self._free_slots:
+                        slot = self._free_slots.pop()
+                        break
+                    if self._idle:
+                        # Retire the least recently used idle driver of another profile
+                        evicted = min(self._idle, key=lambda d: d.last_used)
+                        self._idle.remove(evicted)
+                        slot = evicted.slot
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a WebDriver from the pool")
+                    self._cond.wait(remaining)
+
+            if evicted is not None:
+                self._count('evicted')
+                self._quit(evicted)
+
+            if driver is None:
+                return self._create_in_slot(profile, slot)
+
+            if self._is_healthy(driver):
+                driver.last_used = time.time()
+                self._count('reused')
+                return driver
+
+            self._count('unhealthy')
+            self._discard(driver)
+
+    def release(self, driver: PooledDriver):
+        """Return a driver to the pool, recycling it once it has served enough pages"""
+        if driver is None:
+            return
+
+        if self._closed or driver.page_loads >= self.max_page_loads:
+            if not self._closed:
+                self._count('recycled')
+            self._discard(driver)
+            self._replenish(driver.profile)
+            return
+
+        try:
+            # Don't leak sessions between users sharing the pool
+            self._reset(driver)
+        except Exception as e:
+            self.logger.warning(f"Discarding driver that failed to reset: {e}")
+            self._discard(driver)
+            self._replenish(driver.profile)
+            return
+
+        with self._cond:
+            driver.last_used = time.time()
+            self._idle.append(driver)
+            self._cond.notify_all()
+
+    def warm(self, profile: str = PROFILE_DEFAULT, count: Optional[int] = None):
+        """Start idle drivers in the background so the first checkout is instant"""
+        count = self.min_idle if count is None else count
+        thread = threading.Thread(target=self._fill_idle, args=(profile, count), name="driver-pool-warmup")
+        thread.daemon = True
+        thread.start()
+
+    def close(self):
+        """Quit all idle drivers and refuse new checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for driver in idle:
+            self._discard(driver)
+
+    def get_stats(self) -> Dict:
+        """Pool occupancy and lifetime counters"""
+        with self._cond:
+            total = self.max_size - len(self._free_slots)
+            return {
+                'total': total,
+                'idle': len(self._idle),
+                'in_use': total - len(self._idle),
+                'max_size': self.max_size,
+                **self._stats
+            }
+
+    def _fill_idle(self, profile: str, count: int):
+        """Create drivers of ``profile`` until ``count`` are idle or the pool is full"""
+        while True:
+            with self._cond:
+                idle = sum(1 for d in self._idle if d.profile == profile)
+                if self._closed or idle >= count or not self._free_slots:
+                    return
+                slot = self._free_slots.pop()
+
+            try:
+                driver = self._create_in_slot(profile, slot)
+            except Exception:
+                return
+            self.release(driver)
+
+    def _count(self, name: str):
+        with self._cond:
+            self._stats[name] += 1
+
+    def _replenish(self, profile: str):
+        if self.min_idle > 0 and not self._closed:
+            self.warm(profile)
+
+    def _create_in_slot(self, profile: str, slot: int) -> PooledDriver:
+        """Start a browser in a slot already taken from ``_free_slots``"""
+        try:
+            driver = PooledDriver(self._start_chrome(profile, slot), profile, slot)
+            self._count('created')
+            return driver
+        except Exception:
+            self._free_slot(slot)
+            raise
+
+    def _start_chrome(self, profile: str, slot: int):
+        """Setup Chrome driver with anti-detection measures"""
+        try:
+            chrome_options = Options()
+
+            if self.config.HEADLESS_MODE:
+                chrome_options.add_argument("--headless")
+
+            # Anti-detection measures
+            chrome_options.add_argument("--no-sandbox")
+            chrome_options.add_argument("--disable-dev-shm-usage")
+            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            chrome_options.add_experimental_option('useAutomationExtension', False)
+
+            # User agents rotate per browser instance, i.e. whenever one is recycled
+            if self.config.USER_AGENT_ROTATION:
+                if self._ua is None:
+                    self._ua = UserAgent()
+                chrome_options.add_argument(f"--user-agent={self._ua.random}")
+
+            if profile == PROFILE_LEAN:
+                self._apply_lean_options(chrome_options, slot)
+
+            driver = webdriver.Chrome(options=chrome_options)
+
+            # Execute anti-detection script
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+            if profile == PROFILE_LEAN:
+                try:
+                    driver.execute_cdp_cmd("Network.enable", {})
+                    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+                except Exception as e:
+                    self.logger.warning(f"Could not enable request blocking: {e}")
+
+            return driver
+
+        except Exception as e:
+            self.logger.error(f"Error setting up driver: {e}")
+            raise
+
+    def _apply_lean_options(self, chrome_options: Options, slot: int):
+        """Text-only browsing: no images, CSS, fonts or media, eager page loads and a disk cache"""
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_experimental_option("prefs", LEAN_CONTENT_SETTINGS)
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+        chrome_options.add_argument("--disable-remote-fonts")
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-extensions")
+
+        # One cache directory per pool slot, so concurrent browsers never share
+        # one but a recycled browser picks up where its predecessor left off
+        cache_dir = os.path.abspath(os.path.join(self.config.BROWSER_DISK_CACHE_DIR, f"slot-{slot}"))
+        os.makedirs(cache_dir, exist_ok=True)
+        chrome_options.add_argument(f"--disk-cache-dir={cache_dir}")
+        chrome_options.add_argument(f"--disk-cache-size={self.config.BROWSER_DISK_CACHE_SIZE}")
+
+    def _reset(self, driver: PooledDriver):
+        """Clear every site's cookies and storage, not just the current page's"""
+        driver.origins.add(_origin(driver.current_url))
+        driver.raw.get("about:blank")
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in driver.origins - {""}:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        driver.origins.clear()
+
+    def _is_healthy(self, driver: PooledDriver) -> bool:
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _quit(self, driver: PooledDriver):
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error quitting driver: {e}")
+
+    def _discard(self, driver: PooledDriver):
+        self._quit(driver)
+        self._free_slot(driver.slot)
+
+    def _free_slot(self, slot: int):
+        with self._cond:
+            self._free_slots.add(slot)
+            self._cond.notify_all()
+
+def _origin(url: str) -> str:
+    """scheme://host[:port] of an http(s) URL, or '' for anything else"""
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme in ("http", "https") else ""
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool() -> DriverPool:
+    """Return the process-wide driver pool, creating and warming it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            _pool.warm(Config.SCRAPER_BROWSER_PROFILE)
+            atexit.register(_pool.close)
+        return _pool
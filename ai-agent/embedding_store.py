@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer use only
+    fcntl = None
+
+class EmbeddingStore:
+    """Append-only, memory-mapped matrix of vectors keyed by string.
+
+    ``vectors.bin`` holds fixed-width rows of ``dimensions`` float16 or float32
+    values. ``index.tsv`` is a side file of ``key<TAB>row`` lines, and a later
+    line for a key supersedes an earlier one. ``meta.json`` records the shape
+    and dtype. Rows are written before their index line, so readers never see
+    a key that points past the end of the data.
+
+    Reads are zero-copy views into a read-only ``np.memmap``, so any number of
+    processes can open the same store and share one copy in the page cache.
+    Writers append under an exclusive ``flock``. Readers pick up rows appended
+    by other processes with ``refresh``.
+    """
+
+    def __init__(self, path: Optional[str] = None, dimensions: Optional[int] = None,
+                 dtype: Optional[str] = None, readonly: bool = False):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.path = path or self.config.EMBEDDING_STORE_DIR
+        self.readonly = readonly
+
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        self._index_offset = 0
+        self._matrix: Optional[np.memmap] = None
+
+        self._vectors_path = os.path.join(self.path, 'vectors.bin')
+        self._index_path = os.path.join(self.path, 'index.tsv')
+        self._open_meta(dimensions or self.config.ANN_DIMENSIONS, dtype or self.config.EMBEDDING_STORE_DTYPE)
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Read-only view of the vector stored under ``key``, or None"""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                return None
+            return self._view()[row]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Views for every key that has a vector"""
+        with self._lock:
+            matrix = self._view()
+            return {key: matrix[self._rows[key]] for key in keys if key in self._rows}
+
+    def matrix(self) -> np.ndarray:
+        """Zero-copy view of every row written so far, superseded rows included"""
+        with self._lock:
+            return self._view()
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        """Append vectors, superseding any earlier ones for the same keys"""
+        if self.readonly:
+            raise PermissionError("Embedding store is open read-only")
+        if not keys:
+            return
+        vectors = np.ascontiguousarray(np.asarray(vectors, dtype=self.dtype).reshape(len(keys), self.dimensions))
+
+        with self._lock, self._exclusive():
+            # Another process may have appended since we last looked
+            self.refresh()
+            size = os.path.getsize(self._vectors_path)
+            start = size // self._row_bytes
+            if size % self._row_bytes:
+                # Drop a partial row left by a writer that died mid-append
+                os.truncate(self._vectors_path, start * self._row_bytes)
+            with open(self._vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._index_path, 'a', encoding='utf-8') as f:
+                f.write("".join(f"{key}\t{start + i}\n" for i, key in enumerate(keys)))
+            self.refresh()
+
+    def put(self, key: str, vector: np.ndarray):
+        self.put_many([key], np.asarray(vector).reshape(1, -1))
+
+    def refresh(self):
+        """Load index lines appended since the last call"""
+        with self._lock:
+            if not os.path.exists(self._index_path):
+                return
+            with open(self._index_path, 'rb') as f:
+                f.seek(self._index_offset)
+                data = f.read()
+
+            # Only consume complete lines; a writer may be mid-append
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].decode('utf-8').splitlines():
+                key, _, row = line.rpartition("\t")
+                if key:
+                    self._rows[key] = int(row)
+                    self._count = max(self._count, int(row) + 1)
+            self._index_offset += end
+
+    def _view(self) -> np.ndarray:
+        """Memory map covering every indexed row, remapped only when the file has grown"""
+        if self._matrix is None or len(self._matrix) < self._count:
+            if self._count == 0:
+                return np.zeros((0, self.dimensions), dtype=self.dtype)
+            self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode='r',
+                                     shape=(self._count, self.dimensions))
+        return self._matrix
+
+    @contextmanager
+    def _exclusive(self):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.path, 'write.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open_meta(self, dimensions: int, dtype: str):
+        meta_path = os.path.join(self.path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta['dimensions'] != dimensions or meta['dtype'] != dtype:
+                self.logger.warning(
+                    f"Embedding store at {self.path} holds {meta['dimensions']}-d {meta['dtype']} vectors, "
+                    f"using those instead of {dimensions}-d {dtype}"
+                )
+            dimensions, dtype = meta['dimensions'], meta['dtype']
+        elif not self.readonly:
+            os.makedirs(self.path, exist_ok=True)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'dimensions': dimensions, 'dtype': dtype}, f)
+            open(self._vectors_path, 'ab').close()
+
+        self.dimensions = dimensions
+        self.dtype = np.dtype(dtype)
+        self._row_bytes = self.dimensions * self.dtype.itemsize
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_embedding_store() -> EmbeddingStore:
+    """Return the process-wide embedding store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmbeddingStore()
+        return _store
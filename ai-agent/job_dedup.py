@@ -0,0 +1,308 @@
+import hashlib
+import logging
+import random
+import re
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from config import Config
+from storage import connect
+
+# Query parameters that only carry tracking or paging state
+TRACKING_PARAMS = {
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'trk', 'trackingid', 'refid', 'position', 'pagenum', 'src', 'sid',
+    'from', 'ref', 'gclid', 'fbclid', 'tk', 'vjs', 'advn', 'xkcb'
+}
+
+# Where each source keeps its stable posting ID in a job URL
+SOURCE_ID_PATTERNS = [
+    (re.compile(r'linkedin\.com$'), re.compile(r'/jobs/view/(?:[^/]*-)?(\d+)')),
+    (re.compile(r'naukri\.com$'), re.compile(r'-(\d{9,})$')),
+    (re.compile(r'remoteok\.com$'), re.compile(r'/remote-jobs/(?:[^/]*-)?(\d+)$'))
+]
+
+TITLE_NOISE = re.compile(
+    r'\((?:[^)]*)\)|\[(?:[^\]]*)\]'
+    r'|\s[-|]\s*(?:remote|hybrid|wfh|work from home|urgent(?:ly)? hiring|immediate joiners?)\s*$',
+    re.IGNORECASE
+)
+COMPANY_SUFFIXES = re.compile(
+    r'\b(?:pvt|private|ltd|limited|inc|incorporated|llc|llp|corp|corporation|co|company|plc|gmbh)\b\.?',
+    re.IGNORECASE
+)
+REMOTE_LOCATIONS = {'remote', 'work from home', 'wfh', 'anywhere', 'worldwide'}
+NON_ALNUM = re.compile(r'[^a-z0-9+#]+')
+
+TITLE_ABBREVIATIONS = {
+    'sr': 'senior', 'jr': 'junior', 'dev': 'developer', 'devs': 'developer',
+    'engg': 'engineer', 'eng': 'engineer', 'mgr': 'manager', 'mgmt': 'management',
+    'assoc': 'associate', 'exec': 'executive', 'admin': 'administrator'
+}
+
+# MinHash LSH over company-name trigrams: 8 bands of 2 rows put the candidate
+# threshold near 0.35 Jaccard, well below the similarity needed for a match,
+# so misspelled company names still land in a shared bucket
+LSH_BANDS = 8
+LSH_ROWS = 2
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240801)
+MINHASH_PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(LSH_BANDS * LSH_ROWS)
+]
+
+def canonicalize_url(url: Optional[str]) -> Optional[str]:
+    """Reduce a job URL to a stable form: posting ID where known, else a cleaned URL"""
+    if not url or url == '#':
+        return None
+
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host:
+        return None
+
+    path = parts.path.rstrip('/')
+    query = dict(parse_qsl(parts.query))
+
+    # Indeed identifies postings by the jk parameter on any path
+    if host.endswith('indeed.com') and query.get('jk'):
+        return f"indeed:{query['jk']}"
+
+    for host_pattern, id_pattern in SOURCE_ID_PATTERNS:
+        if host_pattern.search(host):
+            match = id_pattern.search(path)
+            if match:
+                return f"{host.split('.')[-2]}:{match.group(1)}"
+
+    kept = sorted((k, v) for k, v in query.items() if k.lower() not in TRACKING_PARAMS)
+    return urlunsplit(('https', host, path, urlencode(kept), ''))
+
+def normalize_title(title: str) -> str:
+    title = TITLE_NOISE.sub(' ', title or '')
+    return NON_ALNUM.sub(' ', title.lower()).strip()
+
+def normalize_company(company: str) -> str:
+    company = (company or '').lower().replace('&', ' and ')
+    company = COMPANY_SUFFIXES.sub(' ', company)
+    return NON_ALNUM.sub(' ', company).strip()
+
+def normalize_location(location: str) -> str:
+    location = (location or '').lower().strip()
+    if any(remote in location for remote in REMOTE_LOCATIONS):
+        return 'remote'
+    # "Mumbai, Maharashtra, India" and "Mumbai" are the same place
+    return NON_ALNUM.sub(' ', location.split(',')[0]).strip()
+
+def job_fingerprint(job: Dict) -> str:
+    """Exact-match fingerprint over the normalized title, company and location"""
+    text = "|".join((
+        normalize_title(job.get('title', '')),
+        normalize_company(job.get('company', '')),
+        normalize_location(job.get('location', ''))
+    ))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def title_key(title: str) -> str:
+    """Order-insensitive title tokens with common abbreviations expanded"""
+    tokens = {TITLE_ABBREVIATIONS.get(token, token) for token in normalize_title(title).split()}
+    return " ".join(sorted(tokens))
+
+def trigrams(text: str) -> Set[str]:
+    text = f" {text} "
+    return {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+
+def minhash(shingles: Set[str]) -> Tuple[int, ...]:
+    """MinHash signature with one value per permutation in MINHASH_PERMUTATIONS"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in shingles
+    ]
+    return tuple(
+        min((a * h + b) % MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF
+        for a, b in MINHASH_PERMUTATIONS
+    )
+
+def band_hashes(signature: Tuple[int, ...]) -> List[int]:
+    """One signed 64-bit bucket ID per LSH band of the signature"""
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(struct.pack(f'>{LSH_ROWS}I', *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+class JobDeduplicator:
+    """Assigns every job a canonical key shared by all of its duplicates.
+
+    Jobs match on canonical URL, then on an exact normalized fingerprint, then
+    as near-duplicates: same title tokens and location, with a company name
+    that MinHash LSH buckets together and whose trigram Jaccard similarity
+    reaches ``min_similarity``. Every lookup is an indexed SQLite query, so cost per
+    job stays flat and memory stays small as the corpus grows into hundreds
+    of thousands of postings. Postings from the same source with different
+    posting IDs are never merged, even when everything else agrees.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, persistent: bool = False,
+                 min_similarity: Optional[float] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.persistent = persistent
+        self.db_path = (db_path or self.config.SQLITE_DB) if persistent else ':memory:'
+        self.min_similarity = self.config.JOB_DEDUP_MIN_SIMILARITY if min_similarity is None else min_similarity
+
+        self._lock = threading.Lock()
+        # One connection shared under _lock. It's in autocommit mode and every
+        # write is its own short transaction, so the job index never holds
+        # the shared database's write lock between calls.
+        self._conn = connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._setup_database()
+
+    def canonical_key(self, job: Dict) -> str:
+        """Return the key of the job's duplicate cluster, registering it if it's new"""
+        return self._resolve(job, register=True)
+
+    def lookup_key(self, job: Dict) -> str:
+        """The key ``canonical_key`` would return, without writing anything"""
+        return self._resolve(job, register=False)
+
+    def _resolve(self, job: Dict, register: bool) -> str:
+        url = canonicalize_url(job.get('url'))
+        fingerprint = job_fingerprint(job)
+        title = title_key(job.get('title', ''))
+        company = normalize_company(job.get('company', ''))
+        location = normalize_location(job.get('location', ''))
+        source = job.get('source', '')
+
+        with self._lock:
+            if url:
+                row = self._conn.execute('SELECT job_key FROM job_urls WHERE canonical_url = ?', (url,)).fetchone()
+                if row:
+                    return row[0]
+
+            for key, other_source, other_url in self._conn.execute(
+                    'SELECT job_key, source, canonical_url FROM job_index WHERE fingerprint = ?', (fingerprint,)).fetchall():
+                if self._compatible(source, url, other_source, other_url):
+                    return self._alias(key, url) if register else key
+
+            company_trigrams = trigrams(company)
+            buckets = band_hashes(minhash(company_trigrams))
+            for key, other_source, other_url, other_company in self._conn.execute(f'''
+                    SELECT job_key, source, canonical_url, company FROM job_index
+                    WHERE title_key = ? AND location = ?
+                    AND ({" OR ".join(f"band{i} = ?" for i in range(LSH_BANDS))})
+                    ''', (title, location, *buckets)).fetchall():
+                other_trigrams = trigrams(other_company)
+                similarity = len(company_trigrams & other_trigrams) / len(company_trigrams | other_trigrams)
+                if similarity >= self.min_similarity and self._compatible(source, url, other_source, other_url):
+                    return self._alias(key, url) if register else key
+
+            key = hashlib.sha1((url or f"fp:{fingerprint}:{source}").encode('utf-8')).hexdigest()[:20]
+            if not register:
+                return key
+            with self._transaction():
+                self._conn.execute(f'''
+                    INSERT OR IGNORE INTO job_index
+                    (job_key, canonical_url, fingerprint, title_key, company, location, source, first_seen,
+                     {", ".join(f"band{i}" for i in range(LSH_BANDS))})
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, {", ".join("?" * LSH_BANDS)})
+                ''', (key, url, fingerprint, title, company, location, source, time.time(), *buckets))
+                self._alias(key, url)
+            return key
+
+    def assign_key(self, job: Dict) -> str:
+        """Set ``job['job_key']`` to the job's canonical key and return it"""
+        job['job_key'] = self.canonical_key(job)
+        return job['job_key']
+
+    def dedupe(self, jobs: Iterable[Dict]) -> List[Dict]:
+        """Keep the first job of each duplicate cluster, tagging every kept job with its key"""
+        unique_jobs = []
+        seen = set()
+        for job in jobs:
+            key = self.assign_key(job)
+            if key not in seen:
+                seen.add(key)
+                unique_jobs.append(job)
+        return unique_jobs
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM job_index').fetchone()[0]
+
+    @staticmethod
+    def _compatible(source: str, url: Optional[str], other_source: str, other_url: Optional[str]) -> bool:
+        # Two different posting IDs on the same board are different openings
+        return not (source == other_source and url and other_url and url != other_url)
+
+    def _alias(self, key: str, url: Optional[str]) -> str:
+        """Remember another URL of a cluster so the next lookup for it is exact"""
+        if url:
+            self._conn.execute('INSERT OR IGNORE INTO job_urls (canonical_url, job_key) VALUES (?, ?)', (url, key))
+        return key
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+            self._conn.execute('COMMIT')
+        except BaseException:
+            if self._conn.in_transaction:
+                self._conn.execute('ROLLBACK')
+            raise
+
+    def _setup_database(self):
+        """Create the index tables and drop postings past the retention window"""
+        try:
+            with self._transaction():
+                self._conn.execute(f'''
+                    CREATE TABLE IF NOT EXISTS job_index (
+                        job_key TEXT PRIMARY KEY,
+                        canonical_url TEXT,
+                        fingerprint TEXT NOT NULL,
+                        title_key TEXT NOT NULL,
+                        company TEXT NOT NULL,
+                        location TEXT NOT NULL,
+                        source TEXT,
+                        first_seen REAL NOT NULL,
+                        {", ".join(f"band{i} INTEGER NOT NULL" for i in range(LSH_BANDS))}
+                    )
+                ''')
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS job_urls (
+                        canonical_url TEXT PRIMARY KEY,
+                        job_key TEXT NOT NULL
+                    )
+                ''')
+                self._conn.execute('CREATE INDEX IF NOT EXISTS idx_job_index_fingerprint ON job_index (fingerprint)')
+                for i in range(LSH_BANDS):
+                    self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_job_index_band{i} ON job_index (band{i}, title_key, location)')
+
+                cutoff = time.time() - self.config.JOB_INDEX_RETENTION_DAYS * 86400
+                self._conn.execute('DELETE FROM job_urls WHERE job_key IN (SELECT job_key FROM job_index WHERE first_seen < ?)', (cutoff,))
+                self._conn.execute('DELETE FROM job_index WHERE first_seen < ?', (cutoff,))
+
+        except Exception as e:
+            self.logger.error(f"Error setting up job dedup index: {e}")
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_job_index() -> JobDeduplicator:
+    """Return the process-wide job dedup index backed by the persistent corpus"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = JobDeduplicator(persistent=Config.JOB_INDEX_PERSISTENT)
+        return _index
+
+def dedupe_jobs(jobs: Iterable[Dict]) -> List[Dict]:
+    """Drop duplicate postings using the shared index, tagging each job with ``job_key``"""
+    return get_job_index().dedupe(jobs)
@@ -0,0 +1,205 @@
+import logging
+import re
+from typing import Dict, List, Optional
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from config import Config
+
+# Experience levels, in order, as used by ProfileAnalyzer
+EXPERIENCE_LEVELS = ['entry', 'mid', 'senior', 'expert']
+
+# Title words that pin a posting to an experience level
+TITLE_LEVEL_PATTERNS = [
+    (0, re.compile(r'\b(intern|internship|trainee|fresher|graduate|junior|jr)\b')),
+    (3, re.compile(r'\b(principal|staff|architect|head|director|vp|chief)\b')),
+    (2, re.compile(r'\b(senior|sr|lead|manager)\b'))
+]
+
+# Salary units, checked against the lowercased salary text
+SALARY_MULTIPLIERS = [
+    (re.compile(r'\b(crore|crores|cr)\b'), 10000000),
+    (re.compile(r'\b(lakh|lakhs|lac|lacs|lpa)\b'), 100000),
+    (re.compile(r'\d\s*k\b'), 1000)
+]
+
+NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+YEARS_RE = re.compile(r'(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*(?:\+\s*)?(?:yrs|years|year|yr)')
+
+class JobPreRanker:
+    """Cheap local relevance score used to decide which jobs are worth an LLM call.
+
+    Every job in a batch is scored at once. Skill relevance is the IDF-weighted
+    share of the profile's skill and role n-grams that appear in a posting,
+    computed as one sparse matrix product over hashed n-gram vectors. It is
+    combined with experience, location and salary fit using the profile
+    matching weights from Config.
+    """
+
+    def __init__(self):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.vectorizer = HashingVectorizer(
+            n_features=2 ** 18,
+            ngram_range=(1, 2),
+            token_pattern=r'(?u)[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]',
+            binary=True,
+            norm=None,
+            alternate_sign=False
+        )
+
+    def score_jobs(self, user_profile: Dict, jobs: List[Dict]) -> np.ndarray:
+        """Local match score in [0, 1] for every job"""
+        if not jobs:
+            return np.zeros(0)
+
+        skills = self._skill_scores(user_profile, jobs)
+        scores = (
+            self.config.SKILLS_WEIGHT * skills
+            + self.config.EXPERIENCE_WEIGHT * self._experience_scores(user_profile, jobs)
+            + self.config.LOCATION_WEIGHT * self._location_scores(user_profile, jobs)
+            + self.config.SALARY_WEIGHT * self._salary_scores(user_profile, jobs)
+        )
+
+        # A posting that shares nothing with the profile's skills and roles is
+        # never a match, however well location and salary line up
+        return np.where(skills > 0, scores, 0.0)
+
+    def select(self, user_profile: Dict, jobs: List[Dict], top_k: Optional[int] = None,
+               min_score: Optional[float] = None) -> List[Dict]:
+        """Best ``top_k`` jobs scoring at least ``min_score``, best first, with ``prerank_score`` set"""
+        top_k = top_k or self.config.PRERANK_TOP_K
+        min_score = self.config.PRERANK_MIN_SCORE if min_score is None else min_score
+
+        try:
+            scores = self.score_jobs(user_profile, jobs)
+        except Exception as e:
+            self.logger.error(f"Error pre-ranking jobs: {e}")
+            return list(jobs)
+
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        selected = []
+        for index in order:
+            if scores[index] < min_score:
+                break
+            job = jobs[index]
+            job['prerank_score'] = round(float(scores[index]), 4)
+            selected.append(job)
+
+        self.logger.debug(f"Pre-ranker kept {len(selected)} of {len(jobs)} jobs")
+        return selected
+
+    def _skill_scores(self, user_profile: Dict, jobs: List[Dict]) -> np.ndarray:
+        terms = list(user_profile.get('skills') or []) + list(user_profile.get('preferred_roles') or [])
+        # Each skill or role is its own document, so n-grams never span two
+        # of them ("django react" is in no posting)
+        columns = np.unique(self.vectorizer.transform([str(term) for term in terms]).indices) if terms else []
+        if len(columns) == 0:
+            return np.full(len(jobs), 0.5)
+
+        # Binary presence of each profile n-gram in each posting
+        presence = self.vectorizer.transform([self._job_text(job) for job in jobs])[:, columns]
+
+        # N-grams every posting shares say little, rarer ones say more
+        document_frequency = np.asarray(presence.sum(axis=0)).ravel()
+        idf = np.log((1 + len(jobs)) / (1 + document_frequency)) + 1
+
+        return np.asarray(presence @ idf).ravel() / idf.sum()
+
+    def _experience_scores(self, user_profile: Dict, jobs: List[Dict]) -> np.ndarray:
+        profile_level = self._profile_level(user_profile)
+        if profile_level is None:
+            return np.full(len(jobs), 0.5)
+
+        job_levels = np.array([self._job_level(job) for job in jobs], dtype=float)
+        scores = 1 - np.abs(job_levels - profile_level) / (len(EXPERIENCE_LEVELS) - 1)
+        return np.where(np.isnan(job_levels), 0.5, scores)
+
+    def _location_scores(self, user_profile: Dict, jobs: List[Dict]) -> np.ndarray:
+        preferences = user_profile.get('location_preferences') or [user_profile.get('location') or '']
+        preferences = [str(p).lower().strip() for p in preferences if p]
+        remote_ok = bool(user_profile.get('remote_preference')) or 'remote' in preferences
+        preferences = [p for p in preferences if p != 'remote']
+        if not preferences and not remote_ok:
+            return np.full(len(jobs), 0.5)
+
+        scores = np.full(len(jobs), 0.5)
+        for i, job in enumerate(jobs):
+            location = str(job.get('location') or '').lower()
+            if not location:
+                continue
+            if (remote_ok and 'remote' in location) or any(p in location or location in p for p in preferences):
+                scores[i] = 1.0
+            else:
+                scores[i] = 0.0
+        return scores
+
+    def _salary_scores(self, user_profile: Dict, jobs: List[Dict]) -> np.ndarray:
+        salary_range = user_profile.get('salary_range') or {}
+        try:
+            wanted = float(salary_range.get('min') or 0)
+        except (TypeError, ValueError):
+            wanted = 0
+        if wanted <= 0:
+            return np.full(len(jobs), 0.5)
+
+        offered = np.array([self._parse_salary(job.get('salary')) for job in jobs], dtype=float)
+        scores = np.clip(offered / wanted, 0.0, 1.0)
+        return np.where(np.isnan(offered), 0.5, scores)
+
+    def _job_text(self, job: Dict) -> str:
+        parts = [job.get('title'), job.get('description'), job.get('job_type')]
+        for field in ('skills', 'requirements'):
+            value = job.get(field)
+            parts.append(" ".join(value) if isinstance(value, list) else value)
+        return "\n".join(str(part) for part in parts if part)
+
+    def _profile_level(self, user_profile: Dict) -> Optional[int]:
+        level = str(user_profile.get('experience_level') or '').lower()
+        if level in EXPERIENCE_LEVELS:
+            return EXPERIENCE_LEVELS.index(level)
+        if level:
+            return None
+        return self._years_to_level(str(user_profile.get('experience') or ''))
+
+    def _job_level(self, job: Dict) -> Optional[int]:
+        level = self._years_to_level(str(job.get('experience') or ''))
+        if level is not None:
+            return level
+
+        title = str(job.get('title') or '').lower()
+        for level, pattern in TITLE_LEVEL_PATTERNS:
+            if pattern.search(title):
+                return level
+        return None
+
+    def _years_to_level(self, text: str) -> Optional[int]:
+        """Map "3-5 years" style text onto EXPERIENCE_LEVELS"""
+        match = YEARS_RE.search(text.lower())
+        if not match:
+            return None
+        low = float(match.group(1))
+        high = float(match.group(2) or low)
+        years = (low + high) / 2
+        if years < 2:
+            return 0
+        if years < 5:
+            return 1
+        if years < 10:
+            return 2
+        return 3
+
+    def _parse_salary(self, text) -> float:
+        """Top of the advertised salary range, or NaN if it can't be read"""
+        if not text:
+            return np.nan
+        text = str(text).lower()
+        numbers = [float(n) for n in NUMBER_RE.findall(text.replace(',', ''))]
+        if not numbers:
+            return np.nan
+
+        multiplier = 1
+        for pattern, value in SALARY_MULTIPLIERS:
+            if pattern.search(text):
+                multiplier = value
+                break
+        return max(numbers) * multiplier
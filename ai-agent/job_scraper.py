@@ -1,435 +1,564 @@
 import requests
+import asyncio
+import queue
 import time
 import random
+import re
 import logging
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup
-from selenium import webdriver
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from fake_useragent import UserAgent
 from config import Config
+from driver_pool import get_driver_pool
+from job_dedup import dedupe_jobs
+from result_cache import get_scrape_cache
+
+# Scraper method and display name for each supported source
+SOURCE_SCRAPERS = {
+    'naukri': 'scrape_naukri_jobs',
+    'indeed_india': 'scrape_indeed_jobs',
+    'linkedin_india': 'scrape_linkedin_jobs',
+    'remoteok': 'scrape_remoteok_jobs'
+}
+
+SOURCE_LABELS = {
+    'naukri': 'Naukri',
+    'indeed_india': 'Indeed India',
+    'linkedin_india': 'LinkedIn India',
+    'remoteok': 'RemoteOK'
+}
+
+# Sources scraped by scrape_all_sources when none are given
+DEFAULT_SOURCES = ['naukri', 'indeed_india', 'linkedin_india']
+
+DEFAULT_LOCATION = "Mumbai"
+
+# Profile locations that don't name a place the boards can search in
+NON_SEARCH_LOCATIONS = {"", "remote", "anywhere", "work from home", "wfh", "india"}
+
+def search_location(profile: Dict) -> str:
+    """City to search in for a user profile: "Mumbai, Maharashtra" searches Mumbai"""
+    city = (profile.get('location') or '').split(',')[0].strip()
+    return DEFAULT_LOCATION if city.lower() in NON_SEARCH_LOCATIONS else city
+
+def _url_slug(text: str) -> str:
+    """Lowercase, hyphen-separated form of a query or location for URL paths"""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+# Declarative selectors for each source's job cards. Every field maps to a CSS
+# selector relative to the card and what to read from it: "text", "list" (comma
+# separated text) or an attribute name. The same spec drives both the in-browser
+# extraction script and BeautifulSoup parsing of HTTP responses.
+SELECTOR_SPECS = {
+    'naukri': {
+        'card': '.jobTuple',
+        'base_url': 'https://www.naukri.com',
+        'fields': {
+            'title': ('a.title', 'text'),
+            'url': ('a.title', 'href'),
+            'company': ('a.subTitle', 'text'),
+            'location': ('span.location', 'text'),
+            'experience': ('span.experience', 'text'),
+            'salary': ('span.salary', 'text'),
+            'skills': ('div.tags', 'list')
+        },
+        'required': ['title', 'company', 'location'],
+        'defaults': {'url': '#', 'experience': 'Not specified', 'salary': 'Not specified'}
+    },
+    'indeed_india': {
+        'card': '.job_seen_beacon',
+        'base_url': 'https://in.indeed.com',
+        'fields': {
+            'title': ('h2.jobTitle a', 'text'),
+            'url': ('h2.jobTitle a', 'href'),
+            'company': ('span.companyName', 'text'),
+            'location': ('div.companyLocation', 'text'),
+            'salary': ('div.metadata.salary-snippet', 'text'),
+            'job_type': ('div.metadata', 'text')
+        },
+        'required': ['title'],
+        'defaults': {
+            'url': '#',
+            'company': 'Company not specified',
+            'location': 'Location not specified',
+            'salary': 'Salary not specified',
+            'job_type': 'Full-time'
+        }
+    },
+    'linkedin_india': {
+        'card': '.base-card',
+        'base_url': 'https://www.linkedin.com',
+        'fields': {
+            'title': ('h3.base-search-card__title', 'text'),
+            'company': ('h4.base-search-card__subtitle', 'text'),
+            'location': ('span.job-search-card__location', 'text'),
+            'url': ('a.base-card__full-link', 'href'),
+            'posted_date': ('time.job-search-card__listdate', 'datetime')
+        },
+        'required': ['title', 'company', 'location'],
+        'defaults': {'url': '#', 'posted_date': 'Recent'}
+    },
+    'remoteok': {
+        'card': 'tr.job',
+        'base_url': 'https://remoteok.com',
+        'fields': {
+            'title': ('h2', 'text'),
+            'company': ('h3', 'text'),
+            'location': ('.location', 'text'),
+            'salary': ('.salary', 'text'),
+            'url': ('a', 'href')
+        },
+        'required': ['title', 'company'],
+        'defaults': {'location': 'Remote', 'salary': 'Not specified', 'url': '#'}
+    }
+}
+
+# Seconds to wait for the first card and the range of the random settle delay
+# after each browser page load
+BROWSER_WAITS = {
+    'naukri': (15, (3, 5)),
+    'indeed_india': (10, (2, 4)),
+    'linkedin_india': (15, (3, 5)),
+    'remoteok': (10, (2, 4))
+}
+
+# Evaluates a selector spec against every card on the page and returns all
+# fields as one array, so a listing page costs a single WebDriver round trip
+EXTRACT_CARDS_JS = """
+const [cardSelector, fields, limit] = arguments;
+const cards = Array.from(document.querySelectorAll(cardSelector)).slice(0, limit);
+return cards.map(card => {
+    const out = {};
+    for (const [name, [selector, kind]] of Object.entries(fields)) {
+        const el = card.querySelector(selector);
+        if (!el) {
+            out[name] = null;
+        } else if (kind === 'text' || kind === 'list') {
+            out[name] = (el.innerText || el.textContent || '').trim();
+        } else if (kind === 'href') {
+            out[name] = el.href || el.getAttribute('href');
+        } else {
+            out[name] = el.getAttribute(kind);
+        }
+    }
+    return out;
+});
+"""
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide HTTP session used for browserless scraping.
+
+    The session keeps connections alive per host, negotiates gzip and retries
+    transient failures, so workers share one connection pool instead of each
+    paying for their own TCP/TLS handshakes.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            config = Config()
+            retry = Retry(
+                total=2,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"]
+            )
+            adapter = HTTPAdapter(
+                pool_connections=config.HTTP_POOL_CONNECTIONS,
+                pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                max_retries=retry
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                'Accept': 'text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8',
+                'Accept-Encoding': 'gzip, deflate',
+                'Accept-Language': 'en-IN,en;q=0.9',
+                'Connection': 'keep-alive'
+            })
+            _http_session = session
+        return _http_session
 
 class JobScraper:
-    def __init__(self):
+    def __init__(self, browser_profile: Optional[str] = None):
         self.config = Config()
         self.logger = logging.getLogger(__name__)
         self.ua = UserAgent()
+        self.browser_profile = browser_profile or self.config.SCRAPER_BROWSER_PROFILE
         self.driver = None
-        self.session = requests.Session()
+        self.session = get_http_session()
         
     def setup_driver(self):
-        """Setup Chrome driver with anti-detection measures"""
+        """Check out a Chrome driver from the shared driver pool"""
         try:
-            chrome_options = Options()
-            
-            if self.config.HEADLESS_MODE:
-                chrome_options.add_argument("--headless")
-            
-            # Anti-detection measures
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            if self.config.USER_AGENT_ROTATION:
-                chrome_options.add_argument(f"--user-agent={self.ua.random}")
-            
-            # Fix for WebDriver initialization
-            self.driver = webdriver.Chrome(options=chrome_options)
-            
-            # Execute anti-detection script
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
+            self.driver = get_driver_pool().acquire(self.browser_profile)
         except Exception as e:
             self.logger.error(f"Error setting up driver: {e}")
             raise
     
     def close_driver(self):
-        """Close the WebDriver"""
+        """Return the WebDriver to the shared pool"""
         if self.driver:
             try:
-                self.driver.quit()
-                self.driver = None
+                get_driver_pool().release(self.driver)
             except Exception as e:
                 self.logger.error(f"Error closing driver: {e}")
+            finally:
+                self.driver = None
     
-    def scrape_naukri_jobs(self, search_query: str, location: str = "Mumbai", limit: int = 25) -> List[Dict]:
-        """Scrape jobs from Naukri.com (Indian job portal)"""
-        jobs = []
-        try:
-            # Format query for Naukri
-            query = search_query.replace(" ", "-")
-            url = f"https://www.naukri.com/{query}-jobs-in-{location}"
-            
-            if not self.driver:
-                self.setup_driver()
-            
-            self.driver.get(url)
-            time.sleep(random.uniform(3, 5))
-            
-            # Wait for job cards to load
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "jobTuple"))
-            )
-            
-            job_cards = self.driver.find_elements(By.CLASS_NAME, "jobTuple")
-            
-            for card in job_cards[:limit]:
-                try:
-                    job = self._extract_naukri_job(card)
-                    if job:
-                        jobs.append(job)
-                except Exception as e:
-                    self.logger.warning(f"Error extracting Naukri job: {e}")
-                    continue
-                    
-        except Exception as e:
-            self.logger.error(f"Error scraping Naukri: {e}")
-        
-        return jobs
+    def _use_http(self, source: str) -> bool:
+        """Whether a source should be fetched with the HTTP client before falling back to Selenium"""
+        return self.config.SOURCE_FETCH_STRATEGIES.get(source, 'browser') == 'http'
     
-    def _extract_naukri_job(self, card) -> Optional[Dict]:
-        """Extract job information from Naukri job card"""
+    def _fetch_html(self, url: str) -> Optional[BeautifulSoup]:
+        """Fetch a page over the pooled HTTP session and parse it"""
         try:
-            # Extract title
-            title_elem = card.find_element(By.CSS_SELECTOR, "a.title")
-            title = title_elem.text.strip()
-            job_url = title_elem.get_attribute("href")
-            
-            # Extract company
-            company_elem = card.find_element(By.CSS_SELECTOR, "a.subTitle")
-            company = company_elem.text.strip()
-            
-            # Extract location
-            location_elem = card.find_element(By.CSS_SELECTOR, "span.location")
-            location = location_elem.text.strip()
-            
-            # Extract experience
-            try:
-                exp_elem = card.find_element(By.CSS_SELECTOR, "span.experience")
-                experience = exp_elem.text.strip()
-            except:
-                experience = "Not specified"
-            
-            # Extract salary
-            try:
-                salary_elem = card.find_element(By.CSS_SELECTOR, "span.salary")
-                salary = salary_elem.text.strip()
-            except:
-                salary = "Not specified"
-            
-            # Extract skills
-            try:
-                skills_elem = card.find_element(By.CSS_SELECTOR, "div.tags")
-                skills = [skill.strip() for skill in skills_elem.text.split(",")]
-            except:
-                skills = []
+            headers = {}
+            if self.config.USER_AGENT_ROTATION:
+                headers['User-Agent'] = self.ua.random
             
-            return {
-                'title': title,
-                'company': company,
-                'location': location,
-                'experience': experience,
-                'salary': salary,
-                'skills': skills,
-                'url': job_url,
-                'source': 'naukri',
-                'posted_date': 'Recent'
-            }
+            response = self.session.get(url, headers=headers, timeout=self.config.HTTP_TIMEOUT)
+            response.raise_for_status()
+            return BeautifulSoup(response.content, HTML_PARSER)
             
         except Exception as e:
-            self.logger.warning(f"Error extracting Naukri job details: {e}")
+            self.logger.warning(f"HTTP fetch failed for {url}: {e}")
             return None
     
-    def scrape_indeed_jobs(self, search_query: str, location: str = "Mumbai", limit: int = 25) -> List[Dict]:
-        """Scrape jobs from Indeed India"""
-        jobs = []
+    def _iter_browser_page(self, source: str, url: str, limit: int) -> Iterator[Dict]:
+        """Load a listing page in the browser and extract every card in one round trip"""
+        spec = SELECTOR_SPECS[source]
+        wait_timeout, delay_range = BROWSER_WAITS[source]
         try:
-            # Format query for Indeed India
-            query = search_query.replace(" ", "+")
-            location = location.replace(" ", "+")
-            url = f"https://in.indeed.com/jobs?q={query}&l={location}&limit={limit}"
-            
             if not self.driver:
                 self.setup_driver()
             
             self.driver.get(url)
-            time.sleep(random.uniform(2, 4))
+            time.sleep(random.uniform(*delay_range))
             
             # Wait for job cards to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "job_seen_beacon"))
+            WebDriverWait(self.driver, wait_timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, spec['card']))
             )
             
-            job_cards = self.driver.find_elements(By.CLASS_NAME, "job_seen_beacon")
-            
-            for card in job_cards[:limit]:
-                try:
-                    job = self._extract_indeed_job(card)
-                    if job:
-                        jobs.append(job)
-                except Exception as e:
-                    self.logger.warning(f"Error extracting Indeed job: {e}")
-                    continue
-                    
+            cards = self.driver.execute_script(EXTRACT_CARDS_JS, spec['card'], spec['fields'], limit) or []
         except Exception as e:
-            self.logger.error(f"Error scraping Indeed: {e}")
+            self.logger.error(f"Error scraping {SOURCE_LABELS[source]}: {e}")
+            return
         
-        return jobs
+        for fields in cards:
+            job = self._build_job(source, fields)
+            if job:
+                yield job
     
-    def _extract_indeed_job(self, card) -> Optional[Dict]:
-        """Extract job information from Indeed job card"""
-        try:
-            # Extract title
-            title_elem = card.find_element(By.CSS_SELECTOR, "h2.jobTitle a")
-            title = title_elem.text.strip()
-            job_url = "https://in.indeed.com" + title_elem.get_attribute("href")
-            
-            # Extract company
-            try:
-                company_elem = card.find_element(By.CSS_SELECTOR, "span.companyName")
-                company = company_elem.text.strip()
-            except:
-                company = "Company not specified"
-            
-            # Extract location
-            try:
-                location_elem = card.find_element(By.CSS_SELECTOR, "div.companyLocation")
-                location = location_elem.text.strip()
-            except:
-                location = "Location not specified"
-            
-            # Extract salary
-            try:
-                salary_elem = card.find_element(By.CSS_SELECTOR, "div.metadata.salary-snippet")
-                salary = salary_elem.text.strip()
-            except:
-                salary = "Salary not specified"
-            
-            # Extract job type
-            try:
-                type_elem = card.find_element(By.CSS_SELECTOR, "div.metadata")
-                job_type = type_elem.text.strip()
-            except:
-                job_type = "Full-time"
-            
-            return {
-                'title': title,
-                'company': company,
-                'location': location,
-                'salary': salary,
-                'job_type': job_type,
-                'url': job_url,
-                'source': 'indeed_india',
-                'posted_date': 'Recent'
-            }
-            
-        except Exception as e:
-            self.logger.warning(f"Error extracting Indeed job details: {e}")
-            return None
+    def _iter_http_page(self, source: str, url: str, limit: int) -> Iterator[Dict]:
+        """Fetch a listing page over HTTP and extract cards with the same selector spec"""
+        spec = SELECTOR_SPECS[source]
+        
+        soup = self._fetch_html(url)
+        if soup is None:
+            return
+        
+        for card in soup.select(spec['card'])[:limit]:
+            fields = {}
+            for name, (selector, kind) in spec['fields'].items():
+                elem = card.select_one(selector)
+                if elem is None:
+                    fields[name] = None
+                elif kind in ('text', 'list'):
+                    fields[name] = elem.get_text(" ", strip=True)
+                else:
+                    fields[name] = elem.get(kind)
+            
+            job = self._build_job(source, fields)
+            if job:
+                yield job
     
-    def scrape_linkedin_jobs(self, search_query: str, location: str = "Mumbai", limit: int = 25) -> List[Dict]:
-        """Scrape jobs from LinkedIn India"""
-        jobs = []
-        try:
-            # Format query for LinkedIn
+    def _build_job(self, source: str, fields: Dict) -> Optional[Dict]:
+        """Turn raw extracted card fields into a normalized job dict"""
+        spec = SELECTOR_SPECS[source]
+        
+        job = {}
+        for name, (_, kind) in spec['fields'].items():
+            value = fields.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            
+            if not value:
+                if name in spec['required']:
+                    self.logger.warning(f"Skipping {SOURCE_LABELS[source]} card without {name}")
+                    return None
+                job[name] = spec['defaults'].get(name, [] if kind == 'list' else None)
+            elif kind == 'list':
+                job[name] = [item.strip() for item in value.split(",") if item.strip()]
+            elif name == 'url':
+                job[name] = urljoin(spec['base_url'], value)
+            else:
+                job[name] = value
+        
+        job['source'] = source
+        job.setdefault('posted_date', 'Recent')
+        return job
+    
+    def _listing_urls(self, source: str, search_query: str, location: str, limit: int,
+                      page: int) -> Tuple[Optional[str], Optional[str]]:
+        """Build the (HTTP, browser) URLs of a result page; None where a page doesn't exist"""
+        if source == 'naukri':
+            # Naukri takes the query and location as path slugs
+            suffix = f"-{page}" if page > 1 else ""
+            return None, f"https://www.naukri.com/{_url_slug(search_query)}-jobs-in-{_url_slug(location)}{suffix}"
+        
+        if source == 'indeed_india':
+            # Format query for Indeed India
+            query = search_query.replace(" ", "+")
+            location = location.replace(" ", "+")
+            start = (page - 1) * 10
+            return None, f"https://in.indeed.com/jobs?q={query}&l={location}&limit={limit}&start={start}"
+        
+        if source == 'linkedin_india':
+            # Format query for LinkedIn; public guest listings serve the same
+            # card markup without a browser
             query = search_query.replace(" ", "%20")
             location = location.replace(" ", "%20")
-            url = f"https://www.linkedin.com/jobs/search/?keywords={query}&location={location}&f_LF=f_AL&f_E=2%2C3"
-            
-            if not self.driver:
-                self.setup_driver()
-            
-            self.driver.get(url)
-            time.sleep(random.uniform(3, 5))
-            
-            # Wait for job cards to load
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "base-card"))
+            start = (page - 1) * 25
+            return (
+                f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={query}&location={location}&f_E=2%2C3&start={start}",
+                f"https://www.linkedin.com/jobs/search/?keywords={query}&location={location}&f_LF=f_AL&f_E=2%2C3&start={start}"
             )
-            
-            job_cards = self.driver.find_elements(By.CLASS_NAME, "base-card")
-            
-            for card in job_cards[:limit]:
-                try:
-                    job = self._extract_linkedin_job(card)
-                    if job:
-                        jobs.append(job)
-                except Exception as e:
-                    self.logger.warning(f"Error extracting LinkedIn job: {e}")
-                    continue
-                    
-        except Exception as e:
-            self.logger.error(f"Error scraping LinkedIn: {e}")
         
-        return jobs
+        if source == 'remoteok':
+            # RemoteOK renders every matching listing on a single page
+            if page > 1:
+                return None, None
+            query = search_query.replace(" ", "+")
+            url = f"https://remoteok.com/remote-{query}-jobs"
+            return url, url
+        
+        raise ValueError(f"Unknown job source: {source}")
     
-    def _extract_linkedin_job(self, card) -> Optional[Dict]:
-        """Extract job information from LinkedIn job card"""
-        try:
-            # Extract title
-            title_elem = card.find_element(By.CSS_SELECTOR, "h3.base-search-card__title")
-            title = title_elem.text.strip()
-            
-            # Extract company
-            company_elem = card.find_element(By.CSS_SELECTOR, "h4.base-search-card__subtitle")
-            company = company_elem.text.strip()
-            
-            # Extract location
-            location_elem = card.find_element(By.CSS_SELECTOR, "span.job-search-card__location")
-            location = location_elem.text.strip()
-            
-            # Extract job URL
-            try:
-                url_elem = card.find_element(By.CSS_SELECTOR, "a.base-card__full-link")
-                job_url = url_elem.get_attribute("href")
-            except:
-                job_url = "#"
-            
-            # Extract posted time
-            try:
-                time_elem = card.find_element(By.CSS_SELECTOR, "time.job-search-card__listdate")
-                posted_time = time_elem.get_attribute("datetime")
-            except:
-                posted_time = "Recent"
-            
-            return {
-                'title': title,
-                'company': company,
-                'location': location,
-                'url': job_url,
-                'source': 'linkedin_india',
-                'posted_date': posted_time
-            }
-            
-        except Exception as e:
-            self.logger.warning(f"Error extracting LinkedIn job details: {e}")
-            return None
+    def iter_source_jobs(self, source: str, search_query: str, location: str = "Mumbai", limit: int = 25,
+                         max_pages: Optional[int] = None, use_cache: bool = True) -> Iterator[Dict]:
+        """Yield normalized jobs from one source as each result page is parsed.
+        
+        Results are served from the shared scrape cache when a fresh scrape of
+        the same (source, query, location) exists, and stored there once a
+        scrape runs to completion.
+        """
+        cache = get_scrape_cache() if use_cache and self.config.SCRAPE_CACHE_ENABLED else None
+        if cache:
+            cached = cache.get(source, search_query, location, limit)
+            if cached is not None:
+                self.logger.debug(f"Scrape cache hit for {source} '{search_query}' in {location}")
+                yield from cached
+                return
+        
+        jobs = []
+        for job in self._iter_source_pages(source, search_query, location, limit, max_pages):
+            jobs.append(job)
+            yield job
+        
+        # Empty results are usually a failed load, so don't pin them for a TTL
+        if cache and jobs:
+            cache.put(source, search_query, location, limit, jobs)
+    
+    def _iter_source_pages(self, source: str, search_query: str, location: str, limit: int,
+                           max_pages: Optional[int]) -> Iterator[Dict]:
+        """Walk a source's result pages, yielding new jobs until ``limit`` is reached"""
+        max_pages = max_pages or self.config.MAX_PAGES_PER_SOURCE
+        seen_urls = set()
+        yielded = 0
+        
+        for page in range(1, max_pages + 1):
+            http_url, browser_url = self._listing_urls(source, search_query, location, limit, page)
+            if not http_url and not browser_url:
+                return
+            
+            if page > 1:
+                time.sleep(random.uniform(self.config.SEARCH_DELAY_MIN, self.config.SEARCH_DELAY_MAX))
+            
+            # Browserless fetch first where the source allows it, Selenium as the fallback
+            fetchers = []
+            if http_url and self._use_http(source):
+                fetchers.append((self._iter_http_page, http_url))
+            if browser_url:
+                fetchers.append((self._iter_browser_page, browser_url))
+            
+            new_on_page = 0
+            for attempt, (fetch, url) in enumerate(fetchers, start=1):
+                found_on_page = False
+                for job in fetch(source, url, limit - yielded):
+                    found_on_page = True
+                    if job['url'] != '#' and job['url'] in seen_urls:
+                        continue
+                    seen_urls.add(job['url'])
+                    new_on_page += 1
+                    yielded += 1
+                    yield job
+                    if yielded >= limit:
+                        return
+                
+                if found_on_page:
+                    break
+                if attempt < len(fetchers):
+                    self.logger.info(f"{SOURCE_LABELS[source]} HTTP fetch returned no jobs, falling back to browser")
+            
+            # Stop at the last page, or when a site starts repeating results
+            if new_on_page == 0:
+                return
+    
+    def scrape_naukri_jobs(self, search_query: str, location: str = "Mumbai", limit: int = 25) -> List[Dict]:
+        """Scrape jobs from Naukri.com (Indian job portal)"""
+        return list(self.iter_source_jobs('naukri', search_query, location, limit))
+    
+    def scrape_indeed_jobs(self, search_query: str, location: str = "Mumbai", limit: int = 25) -> List[Dict]:
+        """Scrape jobs from Indeed India"""
+        return list(self.iter_source_jobs('indeed_india', search_query, location, limit))
+    
+    def scrape_linkedin_jobs(self, search_query: str, location: str = "Mumbai", limit: int = 25) -> List[Dict]:
+        """Scrape jobs from LinkedIn India"""
+        return list(self.iter_source_jobs('linkedin_india', search_query, location, limit))
     
     def scrape_remoteok_jobs(self, search_query: str, location: str = "Remote", limit: int = 25) -> List[Dict]:
         """Scrape jobs from RemoteOK"""
-        jobs = []
-        try:
-            # Format query for RemoteOK
-            query = search_query.replace(" ", "+")
-            url = f"https://remoteok.com/remote-{query}-jobs"
-            
-            if not self.driver:
-                self.setup_driver()
-            
-            self.driver.get(url)
-            time.sleep(random.uniform(2, 4))
-            
-            # Wait for job cards to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "job"))
-            )
-            
-            job_cards = self.driver.find_elements(By.CLASS_NAME, "job")
-            
-            for card in job_cards[:limit]:
+        return list(self.iter_source_jobs('remoteok', search_query, location, limit))
+    
+    def iter_jobs(self, search_query: str, location: str = "Mumbai", sources: Optional[List[str]] = None,
+                  limit_per_source: int = 25, max_pages: Optional[int] = None,
+                  parallel: Optional[bool] = None) -> Iterator[Dict]:
+        """Yield normalized jobs from several sources as soon as each one is parsed.
+        
+        In parallel mode every source runs on its own worker and browser and jobs
+        are yielded in the order they arrive, so callers can start scoring and
+        applying while the remaining sources are still being scraped.
+        """
+        sources = sources or DEFAULT_SOURCES
+        if parallel is None:
+            parallel = self.config.PARALLEL_SCRAPING
+        
+        if not parallel or len(sources) == 1:
+            for source in sources:
+                count = 0
                 try:
-                    job = self._extract_remoteok_job(card)
-                    if job:
-                        jobs.append(job)
+                    for job in self.iter_source_jobs(source, search_query, location, limit_per_source, max_pages):
+                        count += 1
+                        yield job
                 except Exception as e:
-                    self.logger.warning(f"Error extracting RemoteOK job: {e}")
-                    continue
-                    
-        except Exception as e:
-            self.logger.error(f"Error scraping RemoteOK: {e}")
+                    self.logger.error(f"Failed to scrape {SOURCE_LABELS[source]}: {e}")
+                self.logger.info(f"Scraped {count} jobs from {SOURCE_LABELS[source]}")
+            return
         
-        return jobs
-    
-    def _extract_remoteok_job(self, card) -> Optional[Dict]:
-        """Extract job information from RemoteOK job card"""
+        results = queue.Queue()
+        stop = threading.Event()
+        max_workers = min(self.config.MAX_SCRAPER_WORKERS, len(sources))
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scraper")
         try:
-            # Extract title
-            title_elem = card.find_element(By.CSS_SELECTOR, "h2")
-            title = title_elem.text.strip()
-            
-            # Extract company
-            company_elem = card.find_element(By.CSS_SELECTOR, "h3")
-            company = company_elem.text.strip()
-            
-            # Extract location
-            try:
-                location_elem = card.find_element(By.CSS_SELECTOR, ".location")
-                location = location_elem.text.strip()
-            except:
-                location = "Remote"
-            
-            # Extract salary
-            try:
-                salary_elem = card.find_element(By.CSS_SELECTOR, ".salary")
-                salary = salary_elem.text.strip()
-            except:
-                salary = "Not specified"
-            
-            # Extract job URL
-            try:
-                url_elem = card.find_element(By.CSS_SELECTOR, "a")
-                job_url = "https://remoteok.com" + url_elem.get_attribute("href")
-            except:
-                job_url = "#"
-            
-            return {
-                'title': title,
-                'company': company,
-                'location': location,
-                'salary': salary,
-                'url': job_url,
-                'source': 'remoteok',
-                'posted_date': 'Recent'
-            }
-            
-        except Exception as e:
-            self.logger.warning(f"Error extracting RemoteOK job details: {e}")
-            return None
+            for source in sources:
+                executor.submit(self._stream_source_isolated, source, search_query, location,
+                                limit_per_source, max_pages, results, stop)
+            
+            remaining = len(sources)
+            while remaining:
+                kind, payload = results.get()
+                if kind == 'job':
+                    yield payload
+                else:
+                    remaining -= 1
+        finally:
+            # Lets workers wind down if the consumer stops early
+            stop.set()
+            executor.shutdown(wait=False)
     
-    def scrape_all_sources(self, search_query: str, location: str = "Mumbai", limit: int = 50) -> List[Dict]:
-        """Scrape jobs from all available sources"""
-        all_jobs = []
+    async def aiter_jobs(self, search_query: str, location: str = "Mumbai", sources: Optional[List[str]] = None,
+                         limit_per_source: int = 25, max_pages: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Async variant of iter_jobs; scraping runs in a worker thread off the event loop"""
+        loop = asyncio.get_running_loop()
+        results = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
         
-        # Scrape from Indian sources first
-        try:
-            naukri_jobs = self.scrape_naukri_jobs(search_query, location, limit//3)
-            all_jobs.extend(naukri_jobs)
-            self.logger.info(f"Scraped {len(naukri_jobs)} jobs from Naukri")
-        except Exception as e:
-            self.logger.error(f"Failed to scrape Naukri: {e}")
+        def publish(item):
+            try:
+                loop.call_soon_threadsafe(results.put_nowait, item)
+            except RuntimeError:
+                # The event loop has already gone away
+                stop.set()
         
-        try:
-            indeed_jobs = self.scrape_indeed_jobs(search_query, location, limit//3)
-            all_jobs.extend(indeed_jobs)
-            self.logger.info(f"Scraped {len(indeed_jobs)} jobs from Indeed India")
-        except Exception as e:
-            self.logger.error(f"Failed to scrape Indeed India: {e}")
+        def produce():
+            jobs = self.iter_jobs(search_query, location, sources, limit_per_source, max_pages)
+            try:
+                for job in jobs:
+                    if stop.is_set():
+                        break
+                    publish(job)
+            except Exception as e:
+                self.logger.error(f"Error streaming jobs for '{search_query}': {e}")
+            finally:
+                jobs.close()
+                publish(done)
         
+        loop.run_in_executor(None, produce)
         try:
-            linkedin_jobs = self.scrape_linkedin_jobs(search_query, location, limit//3)
-            all_jobs.extend(linkedin_jobs)
-            self.logger.info(f"Scraped {len(linkedin_jobs)} jobs from LinkedIn India")
-        except Exception as e:
-            self.logger.error(f"Failed to scrape LinkedIn India: {e}")
+            while True:
+                job = await results.get()
+                if job is done:
+                    break
+                yield job
+        finally:
+            stop.set()
+    
+    def scrape_all_sources(self, search_query: str, location: str = "Mumbai", limit: int = 50,
+                           limit_per_source: Optional[int] = None, sources: Optional[List[str]] = None,
+                           parallel: Optional[bool] = None) -> List[Dict]:
+        """Scrape jobs from all available sources"""
+        sources = sources or DEFAULT_SOURCES
+        if limit_per_source is None:
+            limit_per_source = max(1, limit // len(sources))
+        else:
+            limit = limit_per_source * len(sources)
         
-        # Remove duplicates
-        unique_jobs = []
-        seen = set()
-        for job in all_jobs:
-            key = f"{job['title']}_{job['company']}"
-            if key not in seen:
-                seen.add(key)
-                unique_jobs.append(job)
+        # Remove duplicates, including near-identical cross-posts
+        unique_jobs = dedupe_jobs(
+            self.iter_jobs(search_query, location, sources, limit_per_source, parallel=parallel)
+        )
         
         self.logger.info(f"Total unique jobs found: {len(unique_jobs)}")
         return unique_jobs[:limit]
     
+    def _stream_source_isolated(self, source: str, search_query: str, location: str, limit: int,
+                                max_pages: Optional[int], results: queue.Queue, stop: threading.Event):
+        """Scrape one source with a dedicated scraper, publishing jobs to ``results`` as they're parsed"""
+        scraper = JobScraper(self.browser_profile)
+        count = 0
+        try:
+            for job in scraper.iter_source_jobs(source, search_query, location, limit, max_pages):
+                if stop.is_set():
+                    break
+                count += 1
+                results.put(('job', job))
+            self.logger.info(f"Scraped {count} jobs from {SOURCE_LABELS[source]}")
+        except Exception as e:
+            self.logger.error(f"Failed to scrape {SOURCE_LABELS[source]}: {e}")
+        finally:
+            scraper.close_driver()
+            results.put(('done', source))
+    
     def __del__(self):
         """Cleanup when object is destroyed"""
         self.close_driver()
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from storage import get_storage
+
+class LLMResponseCache:
+    """Content-addressed cache of chat completion responses.
+
+    Entries are keyed by a hash of the model, sampling parameters and the full
+    message list. An in-process LRU answers repeat prompts without touching
+    disk, and a SQLite tier keeps responses across restarts and processes.
+    Entries expire after ``ttl`` seconds, and the SQLite tier is trimmed to
+    ``max_rows`` least recently used rows.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl: Optional[int] = None,
+                 max_memory_entries: Optional[int] = None, max_rows: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or self.config.SQLITE_DB
+        self.ttl = ttl if ttl is not None else self.config.LLM_CACHE_TTL
+        self.max_memory_entries = max_memory_entries or self.config.LLM_CACHE_MAX_MEMORY_ENTRIES
+        self.max_rows = max_rows or self.config.LLM_CACHE_MAX_ROWS
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self._puts_since_trim = 0
+        self.storage = get_storage(self.db_path)
+        self._setup_database()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+        """Stable hash of everything that determines a completion"""
+        payload = json.dumps({
+            'model': model,
+            'messages': messages,
+            'temperature': round(float(temperature), 4),
+            'max_tokens': max_tokens
+        }, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_score_key(model: str, profile: Dict, job: Dict) -> str:
+        """Stable hash of one (profile, job) match score, whatever batch it was scored in"""
+        payload = json.dumps({
+            'model': model,
+            'kind': 'match_score',
+            'profile': profile,
+            'job': job
+        }, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response text for ``key``, or None"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[1]
+
+        row = None
+        try:
+            row = self.storage.fetchone(
+                'SELECT created_at, content FROM llm_cache WHERE cache_key = ? AND created_at >= ?',
+                (key, now - self.ttl)
+            )
+            if row:
+                self.storage.execute('UPDATE llm_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+        except Exception as e:
+            self.logger.warning(f"Error reading LLM cache: {e}")
+
+        with self._lock:
+            if row:
+                self._remember(key, (row[0], row[1]))
+                self._stats['disk_hits'] += 1
+                return row[1]
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: str, model: str, content: str):
+        """Store a response"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, content))
+            self._stats['stores'] += 1
+            self._puts_since_trim += 1
+            trim = self._puts_since_trim >= 100
+            if trim:
+                self._puts_since_trim = 0
+
+        try:
+            with self.storage.transaction() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO llm_cache (cache_key, model, content, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (key, model, content, now, now))
+                if trim:
+                    self._trim(conn, now)
+        except Exception as e:
+            self.logger.warning(f"Error persisting LLM cache entry: {e}")
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and the overall hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _trim(self, conn, now: float):
+        """Drop expired rows and the least recently used rows beyond ``max_rows``"""
+        conn.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl,))
+        conn.execute('''
+            DELETE FROM llm_cache WHERE cache_key IN (
+                SELECT cache_key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_rows,))
+
+    def _remember(self, key: str, entry: Tuple[float, str]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _setup_database(self):
+        try:
+            with self.storage.transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)')
+        except Exception as e:
+            self.logger.error(f"Error setting up LLM cache table: {e}")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the LLM response cache shared by every agent in the process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+import openai
+from config import Config
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+def estimate_request_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Upper-bound token cost of a chat completion: prompt estimate plus the completion limit"""
+    return sum(estimate_tokens(message.get('content') or '') + 4 for message in messages) + max_tokens
+
+class TokenBucket:
+    """Per-minute budget that refills continuously.
+
+    ``reserve`` always succeeds and returns how long the caller must wait
+    before using what it reserved, so waiting can happen in a thread or in an
+    event loop and no lock is held while sleeping.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` from the bucket and return the seconds to wait for it"""
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self, amount: float):
+        """Give back part of an earlier reservation that wasn't used"""
+        if amount <= 0:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+class LLMRateLimiter:
+    """Requests-per-minute and tokens-per-minute budgets shared by every LLM call in the process"""
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        self.config = Config()
+        self.requests = TokenBucket(requests_per_minute or self.config.LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute or self.config.LLM_TOKENS_PER_MINUTE)
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and ``tokens`` tokens, returning the seconds to wait"""
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def acquire(self, tokens: int):
+        """Blocking variant of ``reserve`` for synchronous callers"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int):
+        """Non-blocking variant of ``reserve`` for coroutines"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """Return the difference between a reservation and the tokens actually billed"""
+        if used is not None:
+            self.tokens.refund(reserved - used)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Return the process-wide LLM rate limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = LLMRateLimiter()
+        return _limiter
+
+class AsyncLLMClient:
+    """Concurrent chat completions on AsyncOpenAI.
+
+    At most ``max_concurrency`` requests are in flight at once, every request
+    waits for the shared RPM/TPM budget, and 429s, timeouts and server errors
+    are retried with exponential backoff and full jitter. Create one per event
+    loop (``async with AsyncLLMClient() as client``); the rate limiter behind it
+    is shared process-wide.
+    """
+
+    RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError,
+                        openai.APIConnectionError, openai.InternalServerError, asyncio.TimeoutError)
+
+    def __init__(self, max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                 max_retries: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.timeout = timeout or self.config.LLM_REQUEST_TIMEOUT
+        self.max_retries = self.config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.limiter = get_rate_limiter()
+
+        # Retries are handled here so they go through the rate limiter too
+        self.client = openai.AsyncOpenAI(api_key=self.config.OPENAI_API_KEY, max_retries=0, timeout=self.timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency or self.config.LLM_MAX_CONCURRENCY)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def complete(self, messages: List[Dict], max_tokens: int, temperature: float,
+                       model: Optional[str] = None) -> str:
+        """Run one chat completion and return the message text"""
+        model = model or self.config.AI_MODEL
+        reserved = estimate_request_tokens(messages, max_tokens)
+
+        attempt = 0
+        while True:
+            await self.limiter.acquire_async(reserved)
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        self.client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            max_tokens=max_tokens,
+                            temperature=temperature
+                        ),
+                        timeout=self.timeout
+                    )
+            except self.RETRYABLE_ERRORS as e:
+                # The provider may not have billed a failed call, but assume it did
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                self.logger.warning(f"LLM request failed ({type(e).__name__}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            usage = getattr(response, 'usage', None)
+            self.limiter.settle(reserved, getattr(usage, 'total_tokens', None))
+            return response.choices[0].message.content
+
+    async def close(self):
+        try:
+            await self.client.close()
+        except Exception as e:
+            self.logger.warning(f"Error closing LLM client: {e}")
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than a Retry-After hint"""
+        delay = random.uniform(0, min(self.config.LLM_BACKOFF_MAX,
+                                      self.config.LLM_BACKOFF_BASE * (2 ** attempt)))
+
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        return delay
@@ -0,0 +1,386 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction import FeatureHasher
+from config import Config
+from ann_index import get_job_vector_index
+from embedding_store import get_embedding_store
+from job_dedup import get_job_index, normalize_location, title_key
+
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+
+def skill_terms(text: str) -> List[str]:
+    """Unigrams and bigrams of a piece of text, as skill features"""
+    tokens = TOKEN_RE.findall((text or '').lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+def job_features(job: Dict) -> Dict[str, float]:
+    """Namespaced hashed-feature weights for a posting"""
+    features = {}
+
+    text_parts = [job.get('title'), job.get('description'), job.get('job_type')]
+    for field in ('skills', 'requirements'):
+        value = job.get(field)
+        text_parts.append(" ".join(value) if isinstance(value, list) else value)
+    for term in skill_terms(" ".join(str(part) for part in text_parts if part)):
+        features[f"s:{term}"] = 1.0
+
+    title_words = title_key(job.get('title', '')).split()
+    for word in title_words:
+        features[f"r:{word}"] = 1.0 / len(title_words)
+
+    location = normalize_location(job.get('location', ''))
+    if location:
+        features[f"l:{location}"] = 1.0
+
+    return features
+
+def profile_terms(profile: Dict) -> Dict[str, Set[str]]:
+    """Namespaced features of an analyzed profile: skills, roles and locations"""
+    skills = {f"s:{term}" for skill in profile.get('skills') or [] for term in skill_terms(str(skill))}
+    roles = {f"r:{word}" for role in profile.get('preferred_roles') or [] for word in title_key(str(role)).split()}
+    locations = {normalize_location(str(place)) for place in profile.get('location_preferences') or []}
+    if profile.get('remote_preference'):
+        locations.add('remote')
+    locations = {f"l:{place}" for place in locations if place}
+    return {'s': skills, 'r': roles, 'l': locations}
+
+def namespace_weights(config: Config) -> Dict[str, float]:
+    """Share of the match score each feature namespace carries"""
+    weights = {'s': config.SKILLS_WEIGHT, 'r': config.MATCH_ROLE_WEIGHT, 'l': config.LOCATION_WEIGHT}
+    total = sum(weights.values())
+    return {namespace: weight / total for namespace, weight in weights.items()}
+
+class JobVectorEncoder:
+    """Dense vectors for postings and analyzed profiles.
+
+    Uses the same namespaced features as MatchEngine, hashed with random signs into
+    ``dimensions`` buckets. Each namespace is normalized on its own and weighted
+    by its share of the match score, so the inner product of a profile and a
+    posting vector approximates their weighted feature overlap.
+    """
+
+    def __init__(self, dimensions: Optional[int] = None):
+        self.config = Config()
+        self.dimensions = dimensions or self.config.ANN_DIMENSIONS
+        self.hasher = FeatureHasher(n_features=self.dimensions, input_type='dict', alternate_sign=True)
+        self.weights = namespace_weights(self.config)
+
+    def encode_jobs(self, jobs: List[Dict]) -> np.ndarray:
+        return self._encode([self._split(job_features(job)) for job in jobs])
+
+    def encode_profiles(self, profiles: List[Dict]) -> np.ndarray:
+        return self._encode([
+            {namespace: dict.fromkeys(values, 1.0) for namespace, values in profile_terms(profile).items()}
+            for profile in profiles
+        ])
+
+    def _split(self, features: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+        split = {namespace: {} for namespace in self.weights}
+        for name, value in features.items():
+            split[name[0]][name] = value
+        return split
+
+    def _encode(self, rows: List[Dict[str, Dict[str, float]]]) -> np.ndarray:
+        vectors = np.zeros((len(rows), self.dimensions), dtype=np.float32)
+        for namespace, weight in self.weights.items():
+            block = self.hasher.transform([row.get(namespace) or {} for row in rows]).toarray()
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            vectors += (weight * block / np.maximum(norms, 1e-12)).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+class MatchEngine:
+    """Matches every active user against the whole job corpus in one sparse product.
+
+    Jobs and analyzed profiles are hashed into one feature space with three
+    namespaces:
+
+    - skills: n-grams of the posting text, scored as the IDF-weighted share of
+      the user's skill n-grams a posting contains
+    - role: title words, scored as the share of the posting's title covered by
+      the user's preferred roles
+    - location: the posting's normalized location, matched against the user's
+      preferences
+
+    The namespaces are mixed with SKILLS_WEIGHT, MATCH_ROLE_WEIGHT and
+    LOCATION_WEIGHT, so a score is in [0, 1]. Jobs are appended incrementally
+    and dropped once they're older than JOB_INDEX_RETENTION_DAYS, or oldest
+    first beyond ``max_jobs``.
+
+    Once the corpus reaches ANN_MIN_CORPUS jobs, each user's candidates come
+    from the persistent vector index instead of a scan over every posting,
+    and only those candidates are scored exactly. ``save`` writes the corpus
+    next to the index, and on start the index is reconciled with the reloaded
+    corpus so it never returns postings the engine doesn't have.
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.max_jobs = max_jobs or self.config.MATCH_ENGINE_MAX_JOBS
+        self.retention = self.config.JOB_INDEX_RETENTION_DAYS * 86400
+        self.hasher = FeatureHasher(n_features=2 ** 20, input_type='dict', alternate_sign=False)
+
+        self._lock = threading.Lock()
+        self._jobs: List[Dict] = []
+        self._added_at: List[float] = []  # Parallel to _jobs, so oldest first
+        self._rows: Dict[str, int] = {}  # job_key -> row
+        self._blocks: List[sp.csr_matrix] = []
+        self._matrix = sp.csr_matrix((0, self.hasher.n_features), dtype=np.float32)
+        self._transposed = None
+        self._document_frequency = np.zeros(self.hasher.n_features, dtype=np.int32)
+
+        self.encoder = JobVectorEncoder()
+        self.vector_index = get_job_vector_index() if self.config.ANN_ENABLED else None
+        self.embeddings = None
+        if self.vector_index is not None and self.config.EMBEDDING_STORE_ENABLED:
+            store = get_embedding_store()
+            if store.dimensions == self.encoder.dimensions:
+                self.embeddings = store
+            else:
+                self.logger.warning("Embedding store dimensions don't match ANN_DIMENSIONS, not using it")
+        
+        self.corpus_file = self.config.MATCH_ENGINE_CORPUS_FILE
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def add_jobs(self, jobs: Iterable[Dict]) -> int:
+        """Index jobs not seen before, expire old ones and return how many were added"""
+        index = get_job_index()
+        new_jobs = []
+        with self._lock:
+            self._expire()
+            for job in jobs:
+                key = job.get('job_key') or index.canonical_key(job)
+                if key in self._rows:
+                    continue
+                self._rows[key] = len(self._jobs) + len(new_jobs)
+                new_jobs.append(dict(job, job_key=key))
+
+            if not new_jobs:
+                return 0
+
+            self._append(new_jobs, [time.time()] * len(new_jobs))
+            if self.vector_index is not None:
+                self.vector_index.add([job['job_key'] for job in new_jobs], self._job_vectors(new_jobs))
+
+            excess = len(self._jobs) - self.max_jobs
+            if excess > 0:
+                self._drop_oldest(excess)
+
+        return len(new_jobs)
+
+    def top_k(self, profiles: Dict[str, Dict], k: Optional[int] = None,
+              min_score: Optional[float] = None) -> Dict[str, List[Tuple[Dict, float]]]:
+        """Best ``k`` (job, score) pairs per user, best first"""
+        k = k or self.config.MATCH_ENGINE_TOP_K
+        min_score = self.config.MATCH_ENGINE_MIN_SCORE if min_score is None else min_score
+        user_ids = list(profiles)
+        results = {user_id: [] for user_id in user_ids}
+
+        with self._lock:
+            if not self._jobs or not user_ids:
+                return results
+
+            users = self._user_matrix([profiles[user_id] for user_id in user_ids])
+            if self.vector_index is not None and len(self._jobs) >= self.config.ANN_MIN_CORPUS:
+                return self._top_k_approximate(user_ids, profiles, users, k, min_score)
+
+            jobs_t = self._job_matrix_transposed()
+
+            chunk = self.config.MATCH_ENGINE_USER_CHUNK
+            for start in range(0, len(user_ids), chunk):
+                scores = (users[start:start + chunk] @ jobs_t).tocsr()
+                for offset in range(scores.shape[0]):
+                    row_start, row_end = scores.indptr[offset], scores.indptr[offset + 1]
+                    values = scores.data[row_start:row_end]
+                    columns = scores.indices[row_start:row_end]
+
+                    keep = values >= min_score
+                    values, columns = values[keep], columns[keep]
+                    if len(values) > k:
+                        best = np.argpartition(-values, k - 1)[:k]
+                        values, columns = values[best], columns[best]
+                    order = np.argsort(-values, kind='stable')
+
+                    results[user_ids[start + offset]] = [
+                        (self._jobs[columns[i]], float(values[i])) for i in order
+                    ]
+
+        return results
+
+    def save(self):
+        """Persist the corpus and the vector index"""
+        with self._lock:
+            try:
+                with open(self.corpus_file + '.tmp', 'w', encoding='utf-8') as f:
+                    for job, added_at in zip(self._jobs, self._added_at):
+                        f.write(json.dumps({'added_at': added_at, 'job': job}, default=str) + "\n")
+                os.replace(self.corpus_file + '.tmp', self.corpus_file)
+            except Exception as e:
+                self.logger.error(f"Error saving match corpus: {e}")
+        if self.vector_index is not None:
+            self.vector_index.save()
+
+    def _load(self):
+        """Reload the saved corpus still within retention and drop index entries it doesn't cover"""
+        entries = []
+        if os.path.exists(self.corpus_file):
+            try:
+                with open(self.corpus_file, encoding='utf-8') as f:
+                    entries = [json.loads(line) for line in f if line.strip()]
+            except Exception as e:
+                self.logger.error(f"Error loading match corpus: {e}")
+                entries = []
+
+        with self._lock:
+            cutoff = time.time() - self.retention
+            entries = [
+                entry for entry in entries[-self.max_jobs:]
+                if entry['job'].get('job_key') and entry['added_at'] >= cutoff
+            ]
+            for row, entry in enumerate(entries):
+                self._rows[entry['job']['job_key']] = row
+            if entries:
+                self._append([entry['job'] for entry in entries], [entry['added_at'] for entry in entries])
+                self.logger.info(f"Loaded {len(entries)} jobs into the match corpus")
+
+            if self.vector_index is not None:
+                # Keys from postings the engine no longer has would take up
+                # candidate slots until they aged out
+                stale = [key for key in self.vector_index.keys() if key not in self._rows]
+                if stale:
+                    self.vector_index.remove(stale)
+                    self.logger.info(f"Dropped {len(stale)} vector index entries missing from the corpus")
+                missing = [job for job in self._jobs if job['job_key'] not in self.vector_index]
+                if missing:
+                    self.vector_index.add([job['job_key'] for job in missing], self._job_vectors(missing))
+
+    def _append(self, jobs: List[Dict], added_at: List[float]):
+        block = self.hasher.transform(job_features(job) for job in jobs).astype(np.float32)
+        self._document_frequency += np.bincount(block.indices, minlength=self.hasher.n_features).astype(np.int32)
+        self._jobs.extend(jobs)
+        self._added_at.extend(added_at)
+        self._blocks.append(block)
+        self._transposed = None
+
+    def _expire(self):
+        """Drop postings older than the retention period, which are always the oldest rows"""
+        expired = bisect.bisect_left(self._added_at, time.time() - self.retention)
+        if expired:
+            self._drop_oldest(expired)
+            self.logger.info(f"Expired {expired} jobs from the match corpus")
+
+    def _top_k_approximate(self, user_ids: List[str], profiles: Dict[str, Dict], users: sp.csr_matrix,
+                           k: int, min_score: float) -> Dict[str, List[Tuple[Dict, float]]]:
+        """Score each user only against the nearest postings from the vector index"""
+        matrix = self._job_matrix()
+        queries = self._profile_vectors([profiles[user_id] for user_id in user_ids])
+        results = {}
+        for i, user_id in enumerate(user_ids):
+            hits = self.vector_index.search(queries[i], self.config.ANN_CANDIDATES)
+            rows = [self._rows[key] for key, _ in hits if key in self._rows]
+            if not rows:
+                results[user_id] = []
+                continue
+
+            scores = (users[i] @ matrix[rows].T).toarray().ravel()
+            order = [j for j in np.argsort(-scores, kind='stable')[:k] if scores[j] >= min_score]
+            results[user_id] = [(self._jobs[rows[j]], float(scores[j])) for j in order]
+
+        return results
+
+    def _job_vectors(self, jobs: List[Dict]) -> np.ndarray:
+        """Dense job vectors, read from the embedding store when already computed"""
+        return self._stored_vectors([f"job:{job['job_key']}" for job in jobs], jobs, self.encoder.encode_jobs)
+
+    def _profile_vectors(self, profiles: List[Dict]) -> np.ndarray:
+        """Dense profile vectors keyed by a hash of the features they're built from"""
+        keys = []
+        for profile in profiles:
+            terms = {namespace: sorted(values) for namespace, values in profile_terms(profile).items()}
+            digest = hashlib.sha1(json.dumps(terms, sort_keys=True).encode('utf-8')).hexdigest()
+            keys.append(f"profile:{digest}")
+        return self._stored_vectors(keys, profiles, self.encoder.encode_profiles)
+
+    def _stored_vectors(self, keys: List[str], items: List[Dict], encode) -> np.ndarray:
+        if self.embeddings is None:
+            return encode(items)
+
+        vectors = np.zeros((len(items), self.encoder.dimensions), dtype=np.float32)
+        try:
+            stored = self.embeddings.get_many(keys)
+            missing = [i for i, key in enumerate(keys) if key not in stored]
+            for i, key in enumerate(keys):
+                if key in stored:
+                    vectors[i] = stored[key]
+            if missing:
+                encoded = encode([items[i] for i in missing])
+                vectors[missing] = encoded
+                self.embeddings.put_many([keys[i] for i in missing], encoded)
+        except Exception as e:
+            self.logger.error(f"Error using embedding store: {e}")
+            return encode(items)
+        return vectors
+
+    def _user_matrix(self, profiles: List[Dict]) -> sp.csr_matrix:
+        """Weighted user rows; each namespace's weights sum to its share of the score"""
+        weights = namespace_weights(self.config)
+        idf = np.log((1 + len(self._jobs)) / (1 + self._document_frequency)) + 1
+
+        rows = []
+        for profile in profiles:
+            terms_by_namespace = profile_terms(profile)
+            row = sp.csr_matrix((1, self.hasher.n_features), dtype=np.float32)
+            for namespace, terms in terms_by_namespace.items():
+                if not terms:
+                    continue
+                block = self.hasher.transform([dict.fromkeys(terms, 1.0)]).astype(np.float32)
+                if namespace == 's':
+                    # Rare skills count for more than ones every posting lists
+                    block.data = (idf[block.indices] / idf[block.indices].sum()).astype(np.float32)
+                else:
+                    # Job-side weights already bound these namespaces to [0, 1]
+                    block.data[:] = 1.0
+                row = row + block * weights[namespace]
+            rows.append(row)
+
+        return sp.vstack(rows, format='csr')
+
+    def _job_matrix(self) -> sp.csr_matrix:
+        if self._blocks:
+            self._matrix = sp.vstack([self._matrix] + self._blocks, format='csr')
+            self._blocks = []
+        return self._matrix
+
+    def _job_matrix_transposed(self) -> sp.csr_matrix:
+        if self._transposed is None:
+            self._transposed = self._job_matrix().T.tocsr()
+        return self._transposed
+
+    def _drop_oldest(self, count: int):
+        matrix = self._job_matrix()
+        dropped = matrix[:count]
+        self._document_frequency -= np.bincount(dropped.indices, minlength=self.hasher.n_features).astype(np.int32)
+        self._matrix = matrix[count:]
+
+        dropped_keys = [job['job_key'] for job in self._jobs[:count]]
+        self._jobs = self._jobs[count:]
+        self._added_at = self._added_at[count:]
+        self._rows = {job['job_key']: row for row, job in enumerate(self._jobs)}
+        self._transposed = None
+
+        # Postings that leave the corpus leave the vector index too
+        if self.vector_index is not None:
+            self.vector_index.remove(dropped_keys)
@@ -1,22 +1,45 @@
 import openai
+import asyncio
 import json
 import logging
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from config import Config
+from llm_cache import LLMResponseCache, get_llm_cache
+from llm_client import AsyncLLMClient, estimate_request_tokens, estimate_tokens, get_rate_limiter
+from profile_cache import get_profile_analysis_cache, normalize_profile
+from cover_letters import get_cover_letter_store, template_group
+from skill_ontology import get_skill_ontology
+
+# Fields the pipeline adds to scraped jobs; kept out of prompts so they don't
+# change the cache key of an otherwise identical request
+PIPELINE_JOB_FIELDS = ('job_key', 'match_score', 'prerank_score', 'cover_letter')
 
 class ProfileAnalyzer:
-    def __init__(self):
+    def __init__(self, user_id: Optional[str] = None):
         self.config = Config()
-        self.client = openai.OpenAI(api_key=self.config.OPENAI_API_KEY)
+        self.user_id = user_id
+        self.client = openai.OpenAI(api_key=self.config.OPENAI_API_KEY, timeout=self.config.LLM_REQUEST_TIMEOUT)
         self.logger = logging.getLogger(__name__)
+        self.cache = get_llm_cache() if self.config.LLM_CACHE_ENABLED else None
+        self.rate_limiter = get_rate_limiter()
+        self.analysis_cache = get_profile_analysis_cache()
+        # Letters are only shared between a user's own near-identical postings
+        self.letters = get_cover_letter_store() if user_id and self.config.COVER_LETTER_REUSE else None
         
     def analyze_user_profile(self, profile_data: Dict) -> Dict:
         """Analyze user profile and extract key insights for job matching"""
+        # Analyses are memoized by profile content, so this only reaches the
+        # LLM once per profile edit
+        key = self.analysis_cache.key(profile_data)
+        analysis = self.analysis_cache.get(key)
+        if analysis is not None:
+            return analysis
+        
         try:
-            prompt = self._create_profile_analysis_prompt(profile_data)
+            prompt = self._create_profile_analysis_prompt(normalize_profile(profile_data))
             
-            response = self.client.chat.completions.create(
-                model=self.config.AI_MODEL,
+            content = self._chat_completion(
                 messages=[
                     {"role": "system", "content": "You are an expert job matching AI. Analyze the user profile and extract key information for job matching."},
                     {"role": "user", "content": prompt}
@@ -25,7 +48,8 @@ class ProfileAnalyzer:
                 temperature=self.config.TEMPERATURE
             )
             
-            analysis = json.loads(response.choices[0].message.content)
+            analysis = json.loads(content)
+            self.analysis_cache.put(key, analysis)
             return analysis
             
         except Exception as e:
@@ -34,53 +58,372 @@ class ProfileAnalyzer:
     
     def calculate_job_match_score(self, user_profile: Dict, job: Dict) -> float:
         """Calculate how well a job matches the user's profile"""
+        cached = self._cached_score(user_profile, job)
+        if cached is not None:
+            return cached
+        
         try:
-            prompt = self._create_job_matching_prompt(user_profile, job)
-            
-            response = self.client.chat.completions.create(
-                model=self.config.AI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are an expert job matching AI. Rate how well a job matches a user profile from 0.0 to 1.0."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=100,
-                temperature=self.config.TEMPERATURE
-            )
-            
-            # Extract score from response
-            score_text = response.choices[0].message.content.strip()
-            try:
-                score = float(score_text)
-                return max(0.0, min(1.0, score))  # Clamp between 0 and 1
-            except ValueError:
-                # Fallback to basic scoring
-                return self._fallback_job_matching(user_profile, job)
+            content = self._chat_completion(**self._job_matching_request(user_profile, job))
+            return self._parse_score(content, user_profile, job)
                 
         except Exception as e:
             self.logger.error(f"Error calculating match score: {e}")
             return self._fallback_job_matching(user_profile, job)
     
+    async def acalculate_job_match_score(self, user_profile: Dict, job: Dict, client: AsyncLLMClient) -> float:
+        """Async variant of calculate_job_match_score"""
+        cached = self._cached_score(user_profile, job)
+        if cached is not None:
+            return cached
+        
+        try:
+            content = await self._achat_completion(client, **self._job_matching_request(user_profile, job))
+            return self._parse_score(content, user_profile, job)
+                
+        except Exception as e:
+            self.logger.error(f"Error calculating match score: {e}")
+            return self._fallback_job_matching(user_profile, job)
+    
+    def score_jobs_batch(self, user_profile: Dict, jobs: List[Dict]) -> List[float]:
+        """Score many jobs with one LLM request per batch, in the order given"""
+        # Scores are cached per job, so only the jobs not seen with this
+        # profile before are batched, however the windows fall
+        scores = [self._cached_score(user_profile, job) for job in jobs]
+        uncached = [job for job, score in zip(jobs, scores) if score is None]
+        if not uncached:
+            return scores
+        
+        if self.config.LLM_ASYNC_ENABLED and len(uncached) > 1:
+            fresh = self._run_async(self._ascore_jobs_batch_standalone(user_profile, uncached))
+        else:
+            fresh = []
+            for batch in self._split_scoring_batches(user_profile, uncached):
+                fresh.extend(self._score_batch(user_profile, batch))
+        return self._merge_scores(scores, fresh)
+    
+    async def ascore_jobs_batch(self, user_profile: Dict, jobs: List[Dict], client: AsyncLLMClient) -> List[float]:
+        """Async variant of score_jobs_batch; batches are sent concurrently"""
+        scores = [self._cached_score(user_profile, job) for job in jobs]
+        uncached = [job for job, score in zip(jobs, scores) if score is None]
+        if not uncached:
+            return scores
+        
+        fresh = await self._ascore_uncached(user_profile, uncached, client)
+        return self._merge_scores(scores, fresh)
+    
+    async def _ascore_uncached(self, user_profile: Dict, jobs: List[Dict], client: AsyncLLMClient) -> List[float]:
+        batches = self._split_scoring_batches(user_profile, jobs)
+        results = await asyncio.gather(*(self._ascore_batch(user_profile, batch, client) for batch in batches))
+        return [score for batch_scores in results for score in batch_scores]
+    
+    async def _ascore_jobs_batch_standalone(self, user_profile: Dict, jobs: List[Dict]) -> List[float]:
+        async with AsyncLLMClient() as client:
+            return await self._ascore_uncached(user_profile, jobs, client)
+    
+    @staticmethod
+    def _merge_scores(scores: List[Optional[float]], fresh: List[float]) -> List[float]:
+        fresh = iter(fresh)
+        return [score if score is not None else next(fresh) for score in scores]
+    
+    def _cached_score(self, user_profile: Dict, job: Dict) -> Optional[float]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self._score_key(user_profile, job))
+        return float(cached) if cached is not None else None
+    
+    def _keep_score(self, user_profile: Dict, job: Dict, score: float) -> float:
+        """Cache a score the LLM gave; fallback scores aren't kept"""
+        if self.cache is not None:
+            self.cache.put(self._score_key(user_profile, job), self.config.AI_MODEL, repr(score))
+        return score
+    
+    def _score_key(self, user_profile: Dict, job: Dict) -> str:
+        return LLMResponseCache.make_score_key(self.config.AI_MODEL, user_profile, self._prompt_job(job))
+    
+    def _score_batch(self, user_profile: Dict, jobs: List[Dict]) -> List[float]:
+        """Score one batch, falling back per job for entries the reply doesn't cover"""
+        if len(jobs) == 1:
+            return [self.calculate_job_match_score(user_profile, jobs[0])]
+        
+        try:
+            content = self._chat_completion(**self._batch_matching_request(user_profile, jobs))
+            parsed = self._parse_batch_scores(content, len(jobs))
+        
+        except Exception as e:
+            self.logger.error(f"Error calculating batch match scores: {e}")
+            return [self._fallback_job_matching(user_profile, job) for job in jobs]
+        
+        self._log_missing_scores(parsed)
+        return [self._keep_score(user_profile, job, score) if score is not None
+                else self.calculate_job_match_score(user_profile, job)
+                for score, job in zip(parsed, jobs)]
+    
+    async def _ascore_batch(self, user_profile: Dict, jobs: List[Dict], client: AsyncLLMClient) -> List[float]:
+        """Async variant of _score_batch"""
+        if len(jobs) == 1:
+            return [await self.acalculate_job_match_score(user_profile, jobs[0], client)]
+        
+        try:
+            content = await self._achat_completion(client, **self._batch_matching_request(user_profile, jobs))
+            parsed = self._parse_batch_scores(content, len(jobs))
+        
+        except Exception as e:
+            self.logger.error(f"Error calculating batch match scores: {e}")
+            return [self._fallback_job_matching(user_profile, job) for job in jobs]
+        
+        self._log_missing_scores(parsed)
+        retried = await asyncio.gather(*(
+            self.acalculate_job_match_score(user_profile, job, client)
+            for score, job in zip(parsed, jobs) if score is None
+        ))
+        for score, job in zip(parsed, jobs):
+            if score is not None:
+                self._keep_score(user_profile, job, score)
+        return self._merge_scores(parsed, retried)
+    
+    def _split_scoring_batches(self, user_profile: Dict, jobs: List[Dict]) -> List[List[Dict]]:
+        """Group jobs so each request stays within the batch size and prompt token budget"""
+        budget = self.config.SCORING_BATCH_TOKEN_BUDGET - estimate_tokens(json.dumps(user_profile))
+        
+        batches = []
+        batch = []
+        used = 0
+        for job in jobs:
+            cost = estimate_tokens(json.dumps(self._prompt_job(job)))
+            if batch and (len(batch) >= self.config.SCORING_BATCH_SIZE or used + cost > budget):
+                batches.append(batch)
+                batch = []
+                used = 0
+            batch.append(job)
+            used += cost
+        
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def _parse_score(self, content: str, user_profile: Dict, job: Dict) -> float:
+        """Read a single 0.0-1.0 score, falling back to basic scoring"""
+        score_text = content.strip()
+        try:
+            score = float(score_text)
+            return self._keep_score(user_profile, job, max(0.0, min(1.0, score)))  # Clamp between 0 and 1
+        except ValueError:
+            # Fallback to basic scoring
+            return self._fallback_job_matching(user_profile, job)
+    
+    def _parse_batch_scores(self, content: str, count: int) -> List:
+        """Read ``[{"id": 0, "score": 0.8}, ...]`` into a list of ``count`` scores, None where unusable"""
+        scores = [None] * count
+        
+        text = content.strip()
+        start, end = text.find('['), text.rfind(']')
+        if start == -1 or end < start:
+            return scores
+        
+        try:
+            items = json.loads(text[start:end + 1])
+        except ValueError:
+            return scores
+        
+        for position, item in enumerate(items):
+            try:
+                if isinstance(item, dict):
+                    index, score = int(item['id']), float(item['score'])
+                else:
+                    index, score = position, float(item)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < count:
+                scores[index] = max(0.0, min(1.0, score))  # Clamp between 0 and 1
+        
+        return scores
+    
+    def _log_missing_scores(self, parsed: List):
+        missing = sum(1 for score in parsed if score is None)
+        if missing:
+            self.logger.warning(f"Batch reply missing {missing} of {len(parsed)} scores, scoring them individually")
+    
     def generate_custom_cover_letter(self, user_profile: Dict, job: Dict) -> str:
         """Generate a personalized cover letter for a specific job"""
+        reused = self._reused_cover_letter(user_profile, job)
+        if reused:
+            return reused
+        
         try:
-            prompt = self._create_cover_letter_prompt(user_profile, job)
-            
-            response = self.client.chat.completions.create(
-                model=self.config.AI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are an expert cover letter writer. Create a compelling, personalized cover letter."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
+            content = self._chat_completion(**self._cover_letter_request(user_profile, job))
+            return self._keep_cover_letter(user_profile, job, content.strip())
             
-            return response.choices[0].message.content.strip()
+        except Exception as e:
+            self.logger.error(f"Error generating cover letter: {e}")
+            return self._fallback_cover_letter(user_profile, job)
+    
+    async def agenerate_custom_cover_letter(self, user_profile: Dict, job: Dict, client: AsyncLLMClient) -> str:
+        """Async variant of generate_custom_cover_letter"""
+        reused = self._reused_cover_letter(user_profile, job)
+        if reused:
+            return reused
+        
+        try:
+            content = await self._achat_completion(client, **self._cover_letter_request(user_profile, job))
+            return self._keep_cover_letter(user_profile, job, content.strip())
             
         except Exception as e:
             self.logger.error(f"Error generating cover letter: {e}")
             return self._fallback_cover_letter(user_profile, job)
     
+    def generate_cover_letters(self, user_profile: Dict, jobs: List[Dict],
+                               token_budget: Optional[int] = None) -> List[Optional[str]]:
+        """Generate letters for jobs concurrently, until the estimated token budget runs out.
+
+        Entries are None for jobs past the budget and for failed generations, so
+        callers never mistake a fallback letter for a generated one.
+        """
+        letters = [self._reused_cover_letter(user_profile, job) for job in jobs]
+        
+        # Write one letter per company and title first, so the rest of the
+        # group can reuse it instead of being generated alongside it
+        groups = set()
+        first, rest = [], []
+        for index, job in enumerate(jobs):
+            if letters[index] is None:
+                group = template_group(job)
+                (rest if group in groups else first).append(index)
+                groups.add(group)
+        
+        budget = self._generate_cover_letters_into(user_profile, jobs, first, letters, token_budget)
+        for index in rest:
+            letters[index] = self._reused_cover_letter(user_profile, jobs[index])
+        self._generate_cover_letters_into(user_profile, jobs, [i for i in rest if letters[i] is None], letters, budget)
+        return letters
+    
+    def _generate_cover_letters_into(self, user_profile: Dict, jobs: List[Dict], indexes: List[int],
+                                     letters: List[Optional[str]], token_budget: Optional[int]) -> Optional[int]:
+        """Fill ``letters`` at ``indexes`` while the budget lasts, returning what's left of it"""
+        requests = []
+        for index in indexes:
+            request = self._cover_letter_request(user_profile, jobs[index])
+            cost = estimate_request_tokens(request['messages'], request['max_tokens'])
+            if token_budget is not None:
+                if cost > token_budget:
+                    break
+                token_budget -= cost
+            requests.append((index, request))
+        
+        if requests:
+            generated = self._run_async(self._agenerate_cover_letters([request for _, request in requests]))
+            for (index, _), letter in zip(requests, generated):
+                if letter:
+                    letters[index] = self._keep_cover_letter(user_profile, jobs[index], letter)
+        return token_budget
+    
+    async def _agenerate_cover_letters(self, requests: List[Dict]) -> List[Optional[str]]:
+        async with AsyncLLMClient() as client:
+            results = await asyncio.gather(*(self._achat_completion(client, **request) for request in requests),
+                                           return_exceptions=True)
+        
+        letters = []
+        for result in results:
+            if isinstance(result, BaseException):
+                self.logger.error(f"Error generating cover letter: {result}")
+                letters.append(None)
+            else:
+                letters.append((result or "").strip() or None)
+        return letters
+    
+    def _reused_cover_letter(self, user_profile: Dict, job: Dict) -> Optional[str]:
+        """This user's letter for a near-identical posting, re-rendered for ``job``"""
+        if self.letters is None:
+            return None
+        return self.letters.find_similar(self.user_id, user_profile, job)
+    
+    def _keep_cover_letter(self, user_profile: Dict, job: Dict, letter: str) -> str:
+        if self.letters is not None and letter:
+            self.letters.add_template(self.user_id, user_profile, job, letter)
+        return letter
+    
+    def _job_matching_request(self, user_profile: Dict, job: Dict) -> Dict:
+        return {
+            'messages': [
+                {"role": "system", "content": "You are an expert job matching AI. Rate how well a job matches a user profile from 0.0 to 1.0."},
+                {"role": "user", "content": self._create_job_matching_prompt(user_profile, job)}
+            ],
+            'max_tokens': 100,
+            'temperature': self.config.TEMPERATURE
+        }
+    
+    def _batch_matching_request(self, user_profile: Dict, jobs: List[Dict]) -> Dict:
+        return {
+            'messages': [
+                {"role": "system", "content": "You are an expert job matching AI. Rate how well each job matches a user profile from 0.0 to 1.0."},
+                {"role": "user", "content": self._create_batch_matching_prompt(user_profile, jobs)}
+            ],
+            'max_tokens': 20 + 12 * len(jobs),
+            'temperature': self.config.TEMPERATURE
+        }
+    
+    def _cover_letter_request(self, user_profile: Dict, job: Dict) -> Dict:
+        return {
+            'messages': [
+                {"role": "system", "content": "You are an expert cover letter writer. Create a compelling, personalized cover letter."},
+                {"role": "user", "content": self._create_cover_letter_prompt(user_profile, job)}
+            ],
+            'max_tokens': 500,
+            'temperature': 0.7
+        }
+    
+    def _chat_completion(self, messages: List[Dict], max_tokens: int, temperature: float) -> str:
+        """Run a chat completion, answering repeat requests from the shared cache"""
+        model = self.config.AI_MODEL
+        key = None
+        if self.cache is not None:
+            key = LLMResponseCache.make_key(model, messages, temperature, max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        reserved = estimate_request_tokens(messages, max_tokens)
+        self.rate_limiter.acquire(reserved)
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        self.rate_limiter.settle(reserved, getattr(response.usage, 'total_tokens', None))
+        content = response.choices[0].message.content
+        
+        if key is not None and content:
+            self.cache.put(key, model, content)
+        return content
+    
+    async def _achat_completion(self, client: AsyncLLMClient, messages: List[Dict], max_tokens: int,
+                                temperature: float) -> str:
+        """Async variant of _chat_completion"""
+        model = self.config.AI_MODEL
+        key = None
+        if self.cache is not None:
+            key = LLMResponseCache.make_key(model, messages, temperature, max_tokens)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        
+        content = await client.complete(messages, max_tokens, temperature, model=model)
+        
+        if key is not None and content:
+            self.cache.put(key, model, content)
+        return content
+    
+    def _run_async(self, coroutine):
+        """Run a coroutine to completion from synchronous code"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        
+        # Already inside an event loop: run on a private loop in a helper thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    
     def _create_profile_analysis_prompt(self, profile: Dict) -> str:
         """Create prompt for AI profile analysis"""
         return f"""
@@ -106,7 +449,7 @@ class ProfileAnalyzer:
         Rate how well this job matches the user profile from 0.0 to 1.0.
         
         User Profile: {json.dumps(user_profile, indent=2)}
-        Job: {json.dumps(job, indent=2)}
+        Job: {json.dumps(self._prompt_job(job), indent=2)}
         
         Consider:
         - Skills match
@@ -118,13 +461,36 @@ class ProfileAnalyzer:
         Return only the score as a number (e.g., 0.85)
         """
     
+    def _create_batch_matching_prompt(self, user_profile: Dict, jobs: List[Dict]) -> str:
+        """Create prompt for scoring several jobs against one profile"""
+        job_lines = "\n".join(
+            f"        {index}: {json.dumps(self._prompt_job(job))}" for index, job in enumerate(jobs)
+        )
+        return f"""
+        Rate how well each job matches the user profile from 0.0 to 1.0.
+        
+        User Profile: {json.dumps(user_profile, indent=2)}
+        
+        Jobs:
+{job_lines}
+
+        Consider:
+        - Skills match
+        - Experience level
+        - Location preference
+        - Salary expectations
+        - Industry alignment
+        
+        Return only a JSON array with one entry per job, e.g. [{{"id": 0, "score": 0.85}}, {{"id": 1, "score": 0.4}}]
+        """
+    
     def _create_cover_letter_prompt(self, user_profile: Dict, job: Dict) -> str:
         """Create prompt for cover letter generation"""
         return f"""
         Create a compelling cover letter for this job application.
         
         User Profile: {json.dumps(user_profile, indent=2)}
-        Job: {json.dumps(job, indent=2)}
+        Job: {json.dumps(self._prompt_job(job), indent=2)}
         
         Make it:
         - Personalized to the specific job
@@ -134,6 +500,10 @@ class ProfileAnalyzer:
         - Include specific examples from the user's background
         """
     
+    def _prompt_job(self, job: Dict) -> Dict:
+        """Job fields as scraped, without the ones the pipeline attaches"""
+        return {k: v for k, v in job.items() if k not in PIPELINE_JOB_FIELDS}
+    
     def _fallback_profile_analysis(self, profile_data: Dict) -> Dict:
         """Fallback profile analysis when AI fails"""
         skills = profile_data.get('skills', [])
@@ -154,9 +524,10 @@ class ProfileAnalyzer:
     
     def _fallback_job_matching(self, user_profile: Dict, job: Dict) -> float:
         """Fallback job matching when AI fails"""
-        # Basic scoring based on skills overlap
-        user_skills = set(user_profile.get('skills', []))
-        job_requirements = set(job.get('requirements', []))
+        # Basic scoring based on overlap of normalized skills
+        ontology = get_skill_ontology()
+        user_skills = ontology.profile_skill_ids(user_profile.get('skills', []))
+        job_requirements = ontology.job_skill_ids(job)
         
         if not user_skills or not job_requirements:
             return 0.5
@@ -173,15 +544,15 @@ class ProfileAnalyzer:
         
         return f"""
         Dear Hiring Manager,
-
+        
         I am writing to express my interest in the {job.get('title', 'Software Developer')} position at {job.get('company', 'your company')}.
-
+        
         With expertise in {skills}, I believe I would be a valuable addition to your team. My experience includes developing scalable applications and collaborating with cross-functional teams to deliver high-quality solutions.
-
+        
         I am particularly excited about the opportunity to contribute to {job.get('company', 'your company')} and would welcome the chance to discuss how my skills and experience align with your needs.
-
+        
         Thank you for considering my application. I look forward to hearing from you.
-
+        
         Best regards,
         {name}
         """
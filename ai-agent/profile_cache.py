@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+from config import Config
+from storage import get_storage
+
+# Profile fields that identify or contact the user but say nothing about which
+# jobs suit them. They're left out of the hash so editing them doesn't trigger
+# a new analysis, and out of the analysis prompt for the same reason.
+PROFILE_IDENTITY_FIELDS = frozenset({
+    '_id', 'id', 'user_id', 'userId', 'fullName', 'name', 'firstName', 'lastName',
+    'email', 'phone', 'avatar', 'profilePicture', 'createdAt', 'updatedAt', 'lastLogin', '__v'
+})
+
+def normalize_profile(profile: Dict) -> Dict:
+    """The parts of a profile that affect its analysis, in a canonical form.
+
+    Identity fields and empty values are dropped, strings are whitespace
+    collapsed, and lists of strings are de-duplicated case-insensitively and
+    sorted, since the order skills were entered in doesn't change the analysis.
+    """
+    normalized = {}
+    for key, value in sorted((profile or {}).items()):
+        if key in PROFILE_IDENTITY_FIELDS:
+            continue
+        value = _normalize_value(value)
+        if value not in (None, '', [], {}):
+            normalized[key] = value
+    return normalized
+
+def _normalize_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return normalize_profile(value)
+    if isinstance(value, (list, tuple, set)):
+        values = [_normalize_value(item) for item in value]
+        values = [item for item in values if item not in (None, '', [], {})]
+        if all(isinstance(item, str) for item in values):
+            unique = {}
+            for item in values:
+                unique.setdefault(item.lower(), item)
+            return [unique[key] for key in sorted(unique)]
+        return values
+    return value
+
+def profile_hash(profile: Dict, version: Optional[int] = None) -> str:
+    """Stable hash of a normalized profile and the analysis version"""
+    version = Config.PROFILE_ANALYSIS_VERSION if version is None else version
+    payload = json.dumps({'version': version, 'profile': normalize_profile(profile)},
+                         sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ProfileAnalysisCache:
+    """Profile analyses memoized by profile content hash.
+
+    An analysis is computed once per distinct normalized profile and kept in
+    SQLite, so it survives restarts and is shared by every agent. Rows from
+    other ``PROFILE_ANALYSIS_VERSION`` values are dropped on start, which is
+    how a changed prompt or schema invalidates everything at once.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, version: Optional[int] = None,
+                 max_memory_entries: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or self.config.SQLITE_DB
+        self.version = self.config.PROFILE_ANALYSIS_VERSION if version is None else version
+        self.max_memory_entries = max_memory_entries or self.config.PROFILE_ANALYSIS_MAX_MEMORY_ENTRIES
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self.storage = get_storage(self.db_path)
+        self._setup_database()
+
+    def key(self, profile: Dict) -> str:
+        return profile_hash(profile, self.version)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached analysis for a profile hash, or None"""
+        with self._lock:
+            analysis = self._memory.get(key)
+            if analysis is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return dict(analysis)
+
+        row = None
+        try:
+            row = self.storage.fetchone('''
+                SELECT analysis FROM profile_analysis WHERE profile_hash = ? AND version = ?
+            ''', (key, self.version))
+        except Exception as e:
+            self.logger.warning(f"Error reading profile analysis cache: {e}")
+
+        with self._lock:
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            analysis = json.loads(row[0])
+            self._remember(key, analysis)
+            self._stats['disk_hits'] += 1
+            return dict(analysis)
+
+    def put(self, key: str, analysis: Dict):
+        """Store the analysis computed for a profile hash"""
+        with self._lock:
+            self._remember(key, dict(analysis))
+            self._stats['stores'] += 1
+
+        try:
+            self.storage.execute('''
+                INSERT OR REPLACE INTO profile_analysis (profile_hash, version, analysis, created_at)
+                VALUES (?, ?, ?, ?)
+            ''', (key, self.version, json.dumps(analysis), time.time()))
+        except Exception as e:
+            self.logger.warning(f"Error persisting profile analysis: {e}")
+
+    def preload(self, profiles: Iterable[Dict]) -> int:
+        """Load the stored analyses for ``profiles`` into memory in one query"""
+        keys = list({self.key(profile) for profile in profiles})
+        loaded = 0
+        try:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.storage.fetchall(f'''
+                    SELECT profile_hash, analysis FROM profile_analysis
+                    WHERE version = ? AND profile_hash IN ({",".join("?" * len(chunk))})
+                ''', (self.version, *chunk))
+                with self._lock:
+                    for key, analysis in rows:
+                        self._remember(key, json.loads(analysis))
+                loaded += len(rows)
+        except Exception as e:
+            self.logger.warning(f"Error preloading profile analyses: {e}")
+        return loaded
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and the overall hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, analysis: Dict):
+        self._memory[key] = analysis
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _setup_database(self):
+        try:
+            with self.storage.transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS profile_analysis (
+                        profile_hash TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL,
+                        analysis TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute('DELETE FROM profile_analysis WHERE version != ?', (self.version,))
+        except Exception as e:
+            self.logger.error(f"Error setting up profile analysis table: {e}")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_profile_analysis_cache() -> ProfileAnalysisCache:
+    """Return the process-wide profile analysis cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProfileAnalysisCache()
+        return _cache
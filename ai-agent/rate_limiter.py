@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from storage import get_storage
+
+class ApplicationRateLimiter:
+    """Sliding-window application limits per user and per (user, source).
+
+    Every granted application is a timestamped row in SQLite, so limits hold
+    across cycles, agents and processes. A slot is checked and taken in the
+    same ``BEGIN IMMEDIATE`` transaction, which makes ``acquire`` atomic
+    between processes sharing the database. ``next_slot`` answers when the
+    next application would be allowed, so callers can wait for it instead of
+    polling.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or self.config.SQLITE_DB
+        self.user_limits: List[Tuple[int, int]] = [
+            (86400, self.config.MAX_JOBS_PER_DAY),
+            (3600, self.config.MAX_APPLICATIONS_PER_HOUR)
+        ]
+        self.source_limits: Dict[str, List[Tuple[int, int]]] = {
+            source: [(3600, limit)] for source, limit in self.config.MAX_APPLICATIONS_PER_SOURCE_PER_HOUR.items()
+        }
+        self.retention = max(window for window, _ in self.user_limits)
+
+        self.storage = get_storage(self.db_path)
+        self._setup_database()
+
+    def next_slot(self, user_id: str, source: Optional[str] = None) -> float:
+        """Epoch time of the user's next free slot (on ``source``, if given); now or earlier means free"""
+        try:
+            return self._next_slot(self.storage.connection(), user_id, source, time.time())
+        except Exception as e:
+            self.logger.error(f"Error reading application slots: {e}")
+            return time.time()
+
+    def acquire(self, user_id: str, source: Optional[str] = None) -> Tuple[Optional[int], float]:
+        """Take a slot if one is free now.
+
+        Returns ``(slot_id, now)`` on success, for ``release`` if the
+        application doesn't go through, or ``(None, next_slot)`` if not.
+        """
+        try:
+            with self.storage.transaction() as conn:
+                now = time.time()
+                free_at = self._next_slot(conn, user_id, source, now)
+                if free_at > now:
+                    return None, free_at
+                conn.execute('DELETE FROM application_slots WHERE user_id = ? AND taken_at < ?',
+                             (user_id, now - self.retention))
+                cursor = conn.execute('''
+                    INSERT INTO application_slots (user_id, source, taken_at) VALUES (?, ?, ?)
+                ''', (user_id, source or '', now))
+                return cursor.lastrowid, now
+        except Exception as e:
+            # Failing closed: an unrecorded application could break the limits
+            self.logger.error(f"Error acquiring application slot: {e}")
+            return None, time.time() + 60
+
+    def release(self, slot_id: int):
+        """Give back a slot whose application failed"""
+        try:
+            self.storage.execute('DELETE FROM application_slots WHERE id = ?', (slot_id,))
+        except Exception as e:
+            self.logger.warning(f"Error releasing application slot: {e}")
+
+    def _next_slot(self, conn, user_id: str, source: Optional[str], now: float) -> float:
+        # With N allowed per window, a slot frees up one window after the
+        # Nth most recent application
+        checks = [('', limit) for limit in self.user_limits]
+        checks += [(source, limit) for limit in self.source_limits.get(source, [])]
+        free_at = now
+        for scope, (window, limit) in checks:
+            if limit <= 0:
+                return now + window
+            if scope:
+                row = conn.execute('''
+                    SELECT taken_at FROM application_slots
+                    WHERE user_id = ? AND source = ? AND taken_at > ?
+                    ORDER BY taken_at DESC LIMIT 1 OFFSET ?
+                ''', (user_id, scope, now - window, limit - 1)).fetchone()
+            else:
+                row = conn.execute('''
+                    SELECT taken_at FROM application_slots
+                    WHERE user_id = ? AND taken_at > ?
+                    ORDER BY taken_at DESC LIMIT 1 OFFSET ?
+                ''', (user_id, now - window, limit - 1)).fetchone()
+            if row:
+                free_at = max(free_at, row[0] + window)
+        return free_at
+
+    def _setup_database(self):
+        try:
+            with self.storage.transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS application_slots (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id TEXT NOT NULL,
+                        source TEXT NOT NULL,
+                        taken_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_application_slots_user ON application_slots (user_id, taken_at)')
+                conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_application_slots_source
+                    ON application_slots (user_id, source, taken_at)
+                ''')
+        except Exception as e:
+            self.logger.error(f"Error setting up application slots table: {e}")
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_application_rate_limiter() -> ApplicationRateLimiter:
+    """Return the process-wide application rate limiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ApplicationRateLimiter()
+        return _limiter
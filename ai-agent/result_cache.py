@@ -0,0 +1,146 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from storage import get_storage
+
+class ScrapeResultCache:
+    """TTL cache of scrape results keyed by (source, normalized query, location).
+
+    Lookups hit an in-memory LRU first and fall back to a SQLite table, so a
+    repeat scrape inside the TTL window costs a dictionary or index lookup
+    instead of a browser session, and survives process restarts.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, ttl: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or self.config.SQLITE_DB
+        self.ttl = ttl if ttl is not None else self.config.SCRAPE_CACHE_TTL
+        self.max_entries = max_entries or self.config.SCRAPE_CACHE_MAX_ENTRIES
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, int, List[Dict]]]" = OrderedDict()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self.storage = get_storage(self.db_path)
+        self._setup_database()
+
+    @staticmethod
+    def make_key(source: str, search_query: str, location: str) -> str:
+        """Cache key with query and location normalized for case and whitespace"""
+        query = " ".join(search_query.lower().split())
+        location = " ".join(location.lower().split())
+        return f"{source}|{query}|{location}"
+
+    def get(self, source: str, search_query: str, location: str, limit: int) -> Optional[List[Dict]]:
+        """Return cached jobs if a fresh scrape covering ``limit`` results exists"""
+        key = self.make_key(source, search_query, location)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and self._usable(entry, now, limit):
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return [dict(job) for job in entry[2][:limit]]
+
+        entry = self._load(key)
+        with self._lock:
+            if entry and self._usable(entry, now, limit):
+                self._remember(key, entry)
+                self._stats['disk_hits'] += 1
+                return [dict(job) for job in entry[2][:limit]]
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, source: str, search_query: str, location: str, limit: int, jobs: List[Dict]):
+        """Store the result of a scrape that was asked for ``limit`` jobs"""
+        key = self.make_key(source, search_query, location)
+        entry = (time.time(), limit, [dict(job) for job in jobs])
+
+        with self._lock:
+            self._remember(key, entry)
+            self._stats['stores'] += 1
+
+        try:
+            with self.storage.transaction() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO scrape_cache (cache_key, fetched_at, requested_limit, jobs)
+                    VALUES (?, ?, ?, ?)
+                ''', (key, entry[0], limit, json.dumps(entry[2])))
+                conn.execute('DELETE FROM scrape_cache WHERE fetched_at < ?', (entry[0] - self.ttl,))
+        except Exception as e:
+            self.logger.warning(f"Error persisting scrape cache entry: {e}")
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and the overall hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._memory.clear()
+        try:
+            self.storage.execute('DELETE FROM scrape_cache')
+        except Exception as e:
+            self.logger.warning(f"Error clearing scrape cache: {e}")
+
+    def _usable(self, entry: Tuple[float, int, List[Dict]], now: float, limit: int) -> bool:
+        fetched_at, requested_limit, jobs = entry
+        if now - fetched_at > self.ttl:
+            return False
+        # A truncated scrape can't answer a request for more jobs than it fetched
+        return len(jobs) >= limit or requested_limit >= limit
+
+    def _remember(self, key: str, entry: Tuple[float, int, List[Dict]]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Tuple[float, int, List[Dict]]]:
+        try:
+            row = self.storage.fetchone('''
+                SELECT fetched_at, requested_limit, jobs FROM scrape_cache WHERE cache_key = ?
+            ''', (key,))
+        except Exception as e:
+            self.logger.warning(f"Error reading scrape cache: {e}")
+            return None
+
+        if not row:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _setup_database(self):
+        try:
+            self.storage.execute('''
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    fetched_at REAL NOT NULL,
+                    requested_limit INTEGER NOT NULL,
+                    jobs TEXT NOT NULL
+                )
+            ''')
+        except Exception as e:
+            self.logger.error(f"Error setting up scrape cache table: {e}")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_scrape_cache() -> ScrapeResultCache:
+    """Return the process-wide scrape result cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ScrapeResultCache()
+        return _cache
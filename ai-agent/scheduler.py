@@ -2,13 +2,20 @@ import schedule
 import time
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 import requests
 import json
 
 from config import Config
 from application_agent import ApplicationAgent
+from job_scraper import JobScraper, DEFAULT_SOURCES, search_location
+from job_dedup import dedupe_jobs
+from match_engine import MatchEngine
+from profile_cache import get_profile_analysis_cache
+from cover_letters import get_cover_letter_store
+from applied_jobs import get_applied_jobs
 
 class JobApplicationScheduler:
     def __init__(self):
@@ -18,11 +25,28 @@ class JobApplicationScheduler:
         self.agents = {}  # user_id -> ApplicationAgent
         self.user_profiles = {}  # user_id -> profile_data
         self.search_queries = {}  # user_id -> search_queries
+        self.analyzed_profiles = {}  # user_id -> ProfileAnalyzer analysis
+        self.match_engine = MatchEngine()  # Shared corpus of discovered jobs
+        # Cover letters are written in the background so discovery isn't held up;
+        # the executor lives from start_scheduler to stop_scheduler
+        self.letter_executor = None
+        # Application cycles in flight, and cycles waiting for a user's next free slot
+        self.cycle_lock = threading.Lock()
+        self.running_cycles: Set[str] = set()
+        self.slot_timers: Dict[str, threading.Timer] = {}
         
     def start_scheduler(self):
         """Start the main scheduler"""
         self.logger.info("Starting Job Application Scheduler")
         self.running = True
+        self.letter_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cover-letters")
+        
+        # Load every user's stored analysis in one query before anything needs it
+        self._analyze_profiles()
+        
+        # Same for the jobs each user has already applied to
+        applied = get_applied_jobs().load(self.agents)
+        self.logger.info(f"Loaded {applied} past applications for {len(self.agents)} users")
         
         # Schedule daily job application cycles
         schedule.every().day.at("09:00").do(self.run_daily_application_cycle)
@@ -64,7 +88,15 @@ class JobApplicationScheduler:
             except Exception as e:
                 self.logger.error(f"Error closing agent: {e}")
         
+        with self.cycle_lock:
+            for timer in self.slot_timers.values():
+                timer.cancel()
+            self.slot_timers.clear()
+        
         self.agents.clear()
+        if self.letter_executor:
+            self.letter_executor.shutdown(wait=False, cancel_futures=True)
+            self.letter_executor = None
         self.logger.info("Scheduler stopped")
     
     def add_user(self, user_id: str, auth_token: str, profile_data: Dict, search_queries: List[str]):
@@ -79,6 +111,8 @@ class JobApplicationScheduler:
             # Store user profile and search queries
             self.user_profiles[user_id] = profile_data
             self.search_queries[user_id] = search_queries
+            if self.running:
+                self.analyzed_profiles[user_id] = agent.profile_analyzer.analyze_user_profile(profile_data)
             
             self.logger.info(f"User {user_id} added successfully")
             
@@ -100,30 +134,79 @@ class JobApplicationScheduler:
             if user_id in self.search_queries:
                 del self.search_queries[user_id]
             
+            if user_id in self.analyzed_profiles:
+                del self.analyzed_profiles[user_id]
+            
+            get_cover_letter_store().evict_user(user_id)
+            get_applied_jobs().forget_user(user_id)
+            with self.cycle_lock:
+                timer = self.slot_timers.pop(user_id, None)
+            if timer:
+                timer.cancel()
+            
             self.logger.info(f"User {user_id} removed successfully")
             
         except Exception as e:
             self.logger.error(f"Error removing user {user_id}: {e}")
     
+    def update_user_profile(self, user_id: str, profile_data: Dict) -> bool:
+        """Replace a user's profile; it's only re-analyzed if a field that matters changed"""
+        try:
+            if user_id not in self.agents:
+                self.logger.warning(f"User {user_id} not found for profile update")
+                return False
+            
+            self.user_profiles[user_id] = profile_data
+            self.analyzed_profiles[user_id] = self.agents[user_id].profile_analyzer.analyze_user_profile(profile_data)
+            # Letters written from the old profile no longer apply
+            get_cover_letter_store().evict_user(user_id, keep_profile=profile_data)
+            self.logger.info(f"Updated profile for user {user_id}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Error updating profile for user {user_id}: {e}")
+            return False
+    
+    def _analyze_profiles(self):
+        """Fill in analyses for users that don't have one yet, preloading stored ones first"""
+        pending = [
+            user_id for user_id in self.agents
+            if user_id in self.user_profiles and user_id not in self.analyzed_profiles
+        ]
+        if not pending:
+            return
+        
+        loaded = get_profile_analysis_cache().preload(self.user_profiles[user_id] for user_id in pending)
+        self.logger.info(f"Preloaded {loaded} stored profile analyses for {len(pending)} users")
+        
+        for user_id in pending:
+            try:
+                analyzer = self.agents[user_id].profile_analyzer
+                self.analyzed_profiles[user_id] = analyzer.analyze_user_profile(self.user_profiles[user_id])
+            except Exception as e:
+                self.logger.error(f"Error analyzing profile for user {user_id}: {e}")
+    
     def run_daily_application_cycle(self):
         """Run the main daily application cycle for all users"""
         self.logger.info("Starting daily application cycle")
         
+        # Scrape each distinct search once up front and hand every user's
+        # cycle its share, however long after this the cycle starts
+        results = self._scrape_coalesced(limit_per_source=10)
+        
         for user_id, agent in self.agents.items():
             try:
                 if user_id in self.user_profiles and user_id in self.search_queries:
-                    profile = self.user_profiles[user_id]
-                    queries = self.search_queries[user_id]
+                    # Users still at their limit wait for their slot instead
+                    free_at = agent.next_application_slot()
+                    if free_at > time.time():
+                        self._schedule_cycle_at(user_id, free_at)
+                        continue
                     
                     self.logger.info(f"Running application cycle for user {user_id}")
                     
                     # Run in separate thread to avoid blocking
-                    thread = threading.Thread(
-                        target=agent.run_autonomous_application_cycle,
-                        args=(profile, queries)
-                    )
-                    thread.daemon = True
-                    thread.start()
+                    self._start_application_cycle(user_id, self._user_results(user_id, results))
                     
                     # Small delay between users
                     time.sleep(10)
@@ -133,40 +216,166 @@ class JobApplicationScheduler:
         
         self.logger.info("Daily application cycle completed")
     
+    def _start_application_cycle(self, user_id: str, prefetched: Optional[Dict[str, List[Dict]]] = None) -> bool:
+        """Start a user's application cycle in its own thread, unless one is already running"""
+        with self.cycle_lock:
+            if user_id in self.running_cycles:
+                return False
+            self.running_cycles.add(user_id)
+            timer = self.slot_timers.pop(user_id, None)
+        if timer:
+            timer.cancel()
+        
+        thread = threading.Thread(target=self._run_application_cycle, args=(user_id, prefetched))
+        thread.daemon = True
+        thread.start()
+        return True
+    
+    def _run_application_cycle(self, user_id: str, prefetched: Optional[Dict[str, List[Dict]]] = None):
+        try:
+            agent = self.agents.get(user_id)
+            if agent is None or user_id not in self.user_profiles or user_id not in self.search_queries:
+                return
+            free_at = agent.run_autonomous_application_cycle(
+                self.user_profiles[user_id], self.search_queries[user_id], prefetched
+            )
+        except Exception as e:
+            self.logger.error(f"Error running application cycle for user {user_id}: {e}")
+            return
+        finally:
+            with self.cycle_lock:
+                self.running_cycles.discard(user_id)
+        
+        # Stopped on the limits: pick up again when the next slot frees
+        if free_at is not None:
+            self._schedule_cycle_at(user_id, free_at)
+    
+    def _schedule_cycle_at(self, user_id: str, free_at: float):
+        """Run the user's application cycle again once their next slot is free"""
+        if not self.running:
+            return
+        
+        timer = threading.Timer(max(0.0, free_at - time.time()), self._start_application_cycle, args=(user_id,))
+        timer.daemon = True
+        with self.cycle_lock:
+            previous = self.slot_timers.get(user_id)
+            self.slot_timers[user_id] = timer
+        if previous:
+            previous.cancel()
+        timer.start()
+        self.logger.info(f"User {user_id}: next application slot at {datetime.fromtimestamp(free_at):%Y-%m-%d %H:%M:%S}")
+    
     def run_job_discovery_cycle(self):
         """Run job discovery cycle (without applications)"""
         self.logger.info("Starting job discovery cycle")
+        get_cover_letter_store().purge_expired()
         
-        for user_id, agent in self.agents.items():
+        # Scrape every distinct search once into the shared corpus
+        results = self._scrape_coalesced(limit_per_source=5)
+        added = self.match_engine.add_jobs(dedupe_jobs(job for jobs in results.values() for job in jobs))
+        self.logger.info(f"Added {added} new jobs to the match corpus ({len(self.match_engine)} total)")
+        self.match_engine.save()
+        
+        # Match every user against the whole corpus at once
+        self._analyze_profiles()
+        profiles = {
+            user_id: self.analyzed_profiles[user_id]
+            for user_id in self.agents
+            if user_id in self.user_profiles and user_id in self.analyzed_profiles
+        }
+        candidates = self.match_engine.top_k(profiles)
+        
+        for user_id, matches in candidates.items():
             try:
-                if user_id in self.user_profiles and user_id in self.search_queries:
-                    profile = self.user_profiles[user_id]
-                    queries = self.search_queries[user_id]
-                    
-                    # Just discover jobs, don't apply
-                    self._discover_jobs_for_user(user_id, profile, queries)
+                profile = self.user_profiles[user_id]
+                # Each user gets their own copy to score
+                jobs = [dict(job) for job, _ in matches]
+                
+                # Just discover jobs, don't apply
+                self._discover_jobs_for_user(user_id, profile, jobs)
                     
             except Exception as e:
                 self.logger.error(f"Error in job discovery for user {user_id}: {e}")
         
         self.logger.info("Job discovery cycle completed")
     
-    def _discover_jobs_for_user(self, user_id: str, profile: Dict, queries: List[str]):
-        """Discover jobs for a specific user without applying"""
+    def _collect_searches(self) -> Dict[Tuple[str, str, str], Set[str]]:
+        """Map each distinct (query, location, source) across active users to the users that want it"""
+        searches = {}
+        for user_id in self.agents:
+            if user_id not in self.user_profiles or user_id not in self.search_queries:
+                continue
+            
+            location = search_location(self.user_profiles[user_id])
+            for query in self.search_queries[user_id]:
+                for source in DEFAULT_SOURCES:
+                    searches.setdefault((self._normalize_query(query), location, source), set()).add(user_id)
+        
+        return searches
+    
+    def _user_results(self, user_id: str, results: Dict[Tuple[str, str, str], List[Dict]]) -> Dict[str, List[Dict]]:
+        """A user's share of a coalesced scrape: their own copy of the jobs for each of their queries"""
+        location = search_location(self.user_profiles[user_id])
+        prefetched = {}
+        for query in self.search_queries[user_id]:
+            searches = [(self._normalize_query(query), location, source) for source in DEFAULT_SOURCES]
+            if all(search in results for search in searches):
+                prefetched[query] = [dict(job) for search in searches for job in results[search]]
+        return prefetched
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+    
+    def _scrape_coalesced(self, limit_per_source: int) -> Dict[Tuple[str, str, str], List[Dict]]:
+        """Scrape each distinct search once, however many users share it"""
+        searches = self._collect_searches()
+        results = {}
+        if not searches:
+            return results
+        
+        user_queries = sum(len(users) for users in searches.values())
+        self.logger.info(f"Coalesced {user_queries} user searches into {len(searches)} scrapes")
+        
+        with ThreadPoolExecutor(max_workers=self.config.MAX_SCRAPER_WORKERS, thread_name_prefix="discovery") as executor:
+            futures = {
+                executor.submit(self._scrape_search, query, location, source, limit_per_source): (query, location, source)
+                for query, location, source in searches
+            }
+            for future in as_completed(futures):
+                search = futures[future]
+                try:
+                    results[search] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error scraping {search}: {e}")
+                    results[search] = []
+        
+        return results
+    
+    def _scrape_search(self, query: str, location: str, source: str, limit: int) -> List[Dict]:
+        """Scrape one (query, location, source) with a dedicated scraper"""
+        scraper = JobScraper()
+        try:
+            return list(scraper.iter_source_jobs(source, query, location, limit))
+        finally:
+            scraper.close_driver()
+    
+    def _discover_jobs_for_user(self, user_id: str, profile: Dict, jobs: List[Dict]):
+        """Score a user's discovered jobs without applying"""
         try:
             agent = self.agents[user_id]
             
-            # Use job scraper to find jobs
-            all_jobs = []
-            for query in queries:
-                jobs = agent.job_scraper.scrape_all_sources(query, limit_per_source=5)
-                all_jobs.extend(jobs)
-                time.sleep(1)
+            # Jobs already applied to get no scoring or cover letter
+            jobs = agent.applied_jobs.filter_new(user_id, jobs)
             
             # Calculate match scores
+            # Only jobs the local pre-ranker rates as plausible go to the LLM
+            if agent.pre_ranker:
+                jobs = agent.pre_ranker.select(profile, jobs)
+            
             scored_jobs = []
-            for job in all_jobs:
-                match_score = agent.profile_analyzer.calculate_job_match_score(profile, job)
+            scores = agent.profile_analyzer.score_jobs_batch(profile, jobs)
+            for job, match_score in zip(jobs, scores):
                 job['match_score'] = match_score
                 
                 if match_score >= self.config.MIN_MATCH_SCORE:
@@ -180,9 +389,41 @@ class JobApplicationScheduler:
             # Store discovered jobs for later application
             self._store_discovered_jobs(user_id, scored_jobs[:20])  # Top 20 matches
             
+            letter_executor = self.letter_executor
+            if self.config.COVER_LETTER_PREGENERATE and scored_jobs and letter_executor:
+                letter_executor.submit(
+                    self._pregenerate_cover_letters, user_id, profile,
+                    scored_jobs[:self.config.COVER_LETTER_PREGENERATE_TOP_N]
+                )
+            
         except Exception as e:
             self.logger.error(f"Error discovering jobs for user {user_id}: {e}")
     
+    def _pregenerate_cover_letters(self, user_id: str, profile: Dict, jobs: List[Dict]):
+        """Write and store letters for a user's best matches that don't have one yet"""
+        try:
+            agent = self.agents.get(user_id)
+            if agent is None:
+                return
+            
+            store = get_cover_letter_store()
+            stored = store.stored_jobs(user_id, profile)
+            jobs = [job for job in jobs if job['job_key'] not in stored]
+            if not jobs:
+                return
+            
+            letters = agent.profile_analyzer.generate_cover_letters(
+                profile, jobs, token_budget=self.config.COVER_LETTER_TOKEN_BUDGET
+            )
+            generated = {job['job_key']: letter for job, letter in zip(jobs, letters) if letter}
+            # The profile may have changed while the letters were being written
+            if self.user_profiles.get(user_id) is profile:
+                store.put_many(user_id, profile, generated)
+                self.logger.info(f"User {user_id}: Pre-generated {len(generated)} cover letters")
+            
+        except Exception as e:
+            self.logger.error(f"Error pre-generating cover letters for user {user_id}: {e}")
+    
     def _store_discovered_jobs(self, user_id: str, jobs: List[Dict]):
         """Store discovered jobs for later application"""
         try:
@@ -264,19 +505,11 @@ class JobApplicationScheduler:
             if user_id not in self.user_profiles or user_id not in self.search_queries:
                 raise ValueError(f"Profile or search queries not found for user {user_id}")
             
-            profile = self.user_profiles[user_id]
-            queries = self.search_queries[user_id]
-            agent = self.agents[user_id]
-            
             self.logger.info(f"Running manual application cycle for user {user_id}")
             
             # Run in separate thread
-            thread = threading.Thread(
-                target=agent.run_autonomous_application_cycle,
-                args=(profile, queries)
-            )
-            thread.daemon = True
-            thread.start()
+            if not self._start_application_cycle(user_id):
+                return {"success": False, "error": "An application cycle is already running for this user"}
             
             return {"success": True, "message": "Manual application cycle started"}
             
@@ -304,6 +537,8 @@ class JobApplicationScheduler:
         return {
             "running": self.running,
             "active_users": len(self.agents),
+            "cover_letter_reuse": get_cover_letter_store().get_stats(),
+            "applied_filter": get_applied_jobs().get_stats(),
             "next_job_discovery": schedule.next_run().strftime("%Y-%m-%d %H:%M:%S") if schedule.next_run() else "None",
             "next_application_cycle": schedule.next_run().strftime("%Y-%m-%d %H:%M:%S") if schedule.next_run() else "None"
         }
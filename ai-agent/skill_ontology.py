@@ -0,0 +1,251 @@
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+# Canonical skill -> aliases as they show up in postings and profiles. The
+# canonical name is always an alias of itself, so skills that are also common
+# English words ("go", "c", "swift", "spring", "excel") are listed under
+# unambiguous names, and their bare forms only count in a profile's skill list.
+SKILL_ALIASES = {
+    "Python": ["python3", "python 3", "py"],
+    "Java": ["core java", "java 8", "java8", "j2ee", "jee"],
+    "JavaScript": ["js", "java script", "ecmascript", "es6"],
+    "TypeScript": [],
+    "C Programming": ["c language", "c/c++"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Golang": ["go lang"],
+    "Rust": [],
+    "Kotlin": [],
+    "Swift Programming": ["swift language", "swiftui", "swift ui"],
+    "Scala": [],
+    "Ruby": [],
+    "PHP": [],
+    "R Programming": ["r language"],
+    "SQL": ["t-sql", "tsql", "pl/sql", "plsql"],
+    "Bash": ["shell scripting", "shell script", "unix shell"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "Sass": ["scss"],
+    "React": ["react.js", "reactjs", "react js"],
+    "React Native": ["react-native", "reactnative"],
+    "Angular": ["angular.js", "angularjs", "angular js"],
+    "Vue": ["vue.js", "vuejs", "vue js"],
+    "Next.js": ["nextjs", "next js"],
+    "Redux": [],
+    "Node.js": ["node", "nodejs", "node js"],
+    "Express.js": ["expressjs"],
+    "Django": ["django rest framework", "drf"],
+    "Flask": [],
+    "FastAPI": ["fast api"],
+    "Spring Framework": ["spring boot", "springboot", "spring mvc", "spring cloud"],
+    "Hibernate": [],
+    "Ruby on Rails": ["rails", "ror"],
+    "Laravel": [],
+    ".NET": ["dotnet", "dot net", "asp.net", ".net core", "asp.net core"],
+    "GraphQL": [],
+    "REST APIs": ["restful", "rest api", "restful api", "restful apis"],
+    "Microservices": ["microservice", "micro services"],
+    "PostgreSQL": ["postgres", "postgre sql", "psql"],
+    "MySQL": ["my sql"],
+    "MongoDB": ["mongo", "mongo db"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search", "elk"],
+    "Cassandra": [],
+    "Oracle": ["oracle db", "oracle database"],
+    "SQL Server": ["mssql", "ms sql", "microsoft sql server"],
+    "DynamoDB": ["dynamo db"],
+    "Kafka": ["apache kafka"],
+    "RabbitMQ": ["rabbit mq"],
+    "Spark": ["apache spark", "pyspark"],
+    "Hadoop": ["hdfs"],
+    "Airflow": ["apache airflow"],
+    "AWS": ["amazon web services", "ec2", "s3", "aws lambda"],
+    "Azure": ["microsoft azure"],
+    "GCP": ["google cloud", "google cloud platform"],
+    "Docker": ["containerization", "docker compose"],
+    "Kubernetes": ["k8s", "eks", "aks", "gke"],
+    "Terraform": [],
+    "Ansible": [],
+    "Jenkins": [],
+    "CI/CD": ["ci cd", "cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "Git": ["github", "gitlab", "bitbucket"],
+    "Linux": ["unix", "ubuntu", "centos", "rhel"],
+    "Machine Learning": ["ml", "machine-learning"],
+    "Deep Learning": ["deep-learning", "neural networks"],
+    "NLP": ["natural language processing"],
+    "Computer Vision": ["opencv"],
+    "Data Science": [],
+    "Data Analysis": ["data analytics", "analytics"],
+    "TensorFlow": ["tensor flow", "keras"],
+    "PyTorch": ["torch"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "Pandas": [],
+    "NumPy": ["numpy"],
+    "Power BI": ["powerbi"],
+    "Tableau": [],
+    "MS Excel": ["microsoft excel", "advanced excel"],
+    "Selenium": [],
+    "Jest": [],
+    "JUnit": [],
+    "Pytest": [],
+    "Android": ["android development"],
+    "iOS": ["ios development"],
+    "Flutter": ["dart"],
+    "Figma": [],
+    "UI/UX": ["ui ux", "ui/ux design", "ux", "user experience"],
+    "Agile": ["scrum", "kanban"],
+    "Salesforce": ["sfdc"],
+    "SAP": [],
+    "SEO": ["search engine optimization"],
+    "Digital Marketing": ["online marketing", "performance marketing"]
+}
+
+# Names that are unambiguous in a profile's skill list but not in free text
+PROFILE_ONLY_ALIASES = {
+    "go": "Golang",
+    "c": "C Programming",
+    "r": "R Programming",
+    "swift": "Swift Programming",
+    "spring": "Spring Framework",
+    "express": "Express.js",
+    "excel": "MS Excel",
+    "rest": "REST APIs",
+    "ts": "TypeScript",
+    "cv": "Computer Vision",
+    "dl": "Deep Learning"
+}
+
+# ".net" stays one token so "asp.net" doesn't turn into the word "net"
+TOKEN_RE = re.compile(r'\.?[a-z0-9][a-z0-9+#]*')
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall((text or '').lower())
+
+class SkillOntology:
+    """Canonical skills, their aliases and a token trie that finds them in text.
+
+    Every canonical skill is interned to a small integer, so extracted skill
+    sets are frozensets of ints that are cheap to intersect and compare.
+    Extraction tokenizes once with a regex and walks the trie at each token,
+    taking the longest alias that starts there, so a posting is scanned in a
+    single linear pass regardless of how many aliases are known.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, List[str]]] = None):
+        self._lock = threading.Lock()
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._trie: Dict = {}
+
+        for name, skill_aliases in (aliases if aliases is not None else SKILL_ALIASES).items():
+            self._add(name, skill_aliases)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def extract(self, text: str) -> FrozenSet[int]:
+        """IDs of every known skill mentioned in ``text``"""
+        tokens = tokenize(text)
+        found = set()
+        position = 0
+        while position < len(tokens):
+            node = self._trie
+            match, match_end = None, position
+            for end in range(position, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                if None in node:
+                    match, match_end = node[None], end + 1
+            if match is not None:
+                found.add(match)
+                position = match_end
+            else:
+                position += 1
+        return frozenset(found)
+
+    def job_skill_ids(self, job: Dict) -> FrozenSet[int]:
+        """Skills in a posting's title, tags, requirements and description"""
+        parts = [job.get('title'), job.get('description'), job.get('job_type')]
+        for field in ('skills', 'requirements'):
+            value = job.get(field)
+            parts.extend(value if isinstance(value, list) else [value])
+        # Each part is scanned on its own so an alias never spans two fields
+        ids = set()
+        for part in parts:
+            if part:
+                ids.update(self.extract(str(part)))
+        # A skill tag is a list entry like a profile's, so bare "C" or "Spring" counts there
+        tags = job.get('skills')
+        for tag in tags if isinstance(tags, list) else []:
+            skill_id = self._ids.get(self._profile_key(str(tag)))
+            if skill_id is not None:
+                ids.add(skill_id)
+        return frozenset(ids)
+
+    def profile_skill_ids(self, skills: Iterable[str]) -> FrozenSet[int]:
+        """IDs for a profile's skill list, interning skills the ontology doesn't know yet"""
+        ids = set()
+        for skill in skills or []:
+            skill = str(skill).strip()
+            if not skill:
+                continue
+            skill_id = self._ids.get(self._profile_key(skill))
+            if skill_id is None:
+                skill_id = self.intern(skill)
+            if skill_id is not None:
+                ids.add(skill_id)
+        return frozenset(ids)
+
+    def intern(self, name: str, aliases: Iterable[str] = ()) -> Optional[int]:
+        """ID for ``name``, adding it as a new canonical skill if needed"""
+        with self._lock:
+            return self._add(name, aliases)
+
+    def name(self, skill_id: int) -> str:
+        return self._names[skill_id]
+
+    def names(self, skill_ids: Iterable[int]) -> List[str]:
+        return sorted(self._names[skill_id] for skill_id in skill_ids)
+
+    @staticmethod
+    def _profile_key(skill: str) -> str:
+        key = " ".join(tokenize(skill))
+        return " ".join(tokenize(PROFILE_ONLY_ALIASES.get(key, key)))
+
+    def _add(self, name: str, aliases: Iterable[str]) -> Optional[int]:
+        key = " ".join(tokenize(name))
+        if not key:
+            return None
+
+        skill_id = self._ids.get(key)
+        if skill_id is None:
+            skill_id = len(self._names)
+            self._names.append(name)
+
+        for alias in [name, *aliases]:
+            tokens = tokenize(alias)
+            if not tokens:
+                continue
+            alias_key = " ".join(tokens)
+            # First definition wins when two skills claim the same alias
+            self._ids.setdefault(alias_key, skill_id)
+
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(None, self._ids[alias_key])
+
+        return skill_id
+
+_ontology = None
+_ontology_lock = threading.Lock()
+
+def get_skill_ontology() -> SkillOntology:
+    """Return the process-wide skill ontology"""
+    global _ontology
+    with _ontology_lock:
+        if _ontology is None:
+            _ontology = SkillOntology()
+        return _ontology
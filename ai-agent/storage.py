@@ -0,0 +1,155 @@
+import atexit
+import logging
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+from config import Config
+
+def connect(db_path: str, **kwargs) -> sqlite3.Connection:
+    """Open a connection in WAL mode with the shared busy timeout and statement cache"""
+    conn = sqlite3.connect(
+        db_path,
+        timeout=Config.SQLITE_BUSY_TIMEOUT,
+        cached_statements=Config.SQLITE_CACHED_STATEMENTS,
+        **kwargs
+    )
+    # WAL lets readers run alongside the single writer; NORMAL only fsyncs at
+    # checkpoints, which is still safe against corruption in WAL mode
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+def is_busy(error: Exception) -> bool:
+    """Whether an error means another connection holds the lock"""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+class SQLiteStorage:
+    """Long-lived, per-thread connections to one SQLite database.
+
+    Each thread gets its own connection the first time it touches the
+    database and keeps it, so statements are compiled once per thread and
+    served from the connection's statement cache afterwards. Connections are
+    in autocommit mode: single statements commit on their own, and
+    ``transaction`` groups several into one ``BEGIN IMMEDIATE`` block. Busy
+    errors that outlast the busy timeout are retried with jittered backoff.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.config = Config()
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path or self.config.SQLITE_DB
+        self.max_retries = self.config.SQLITE_BUSY_RETRIES
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, sqlite3.Connection] = {}  # thread ident -> connection
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect(self.db_path, isolation_level=None, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                # Worker threads come and go; close what the finished ones left open
+                alive = {thread.ident for thread in threading.enumerate()}
+                stale = [ident for ident in self._connections if ident not in alive]
+                stale.append(threading.get_ident())
+                for ident in stale:
+                    old = self._connections.pop(ident, None)
+                    if old is not None:
+                        old.close()
+                self._connections[threading.get_ident()] = conn
+        return conn
+
+    def execute(self, sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+        """Run one statement, retrying while the database is busy"""
+        return self._retry(lambda: self.connection().execute(sql, params))
+
+    def executemany(self, sql: str, rows: Iterable[Sequence]) -> sqlite3.Cursor:
+        rows = list(rows)
+        return self._retry(lambda: self.connection().executemany(sql, rows))
+
+    def fetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        return self._retry(lambda: self.connection().execute(sql, params).fetchone())
+
+    def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return self._retry(lambda: self.connection().execute(sql, params).fetchall())
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the block's statements as one write transaction"""
+        conn = self.connection()
+        # Taking the write lock up front means a busy error can only happen
+        # here, where it's safe to retry, and not halfway through the block
+        self._retry(lambda: conn.execute('BEGIN IMMEDIATE'))
+        try:
+            yield conn
+            self._retry(lambda: conn.execute('COMMIT'))
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+    def migrate(self, migrations: Sequence[Sequence[Union[str, Callable[[sqlite3.Connection], None]]]]) -> int:
+        """Apply the migrations past the database's ``PRAGMA user_version``, returning the new version.
+
+        Migration N (1-based) is a list of steps run in the same transaction
+        that records ``user_version = N``, so concurrent processes apply each
+        one exactly once and a failed step leaves nothing behind. A step is a
+        SQL statement, or a function called with the connection for changes
+        SQL can't express.
+        """
+        with self.transaction() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number in range(version + 1, len(migrations) + 1):
+                for step in migrations[number - 1]:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f'PRAGMA user_version = {number}')
+                self.logger.info(f"Migrated {self.db_path} to schema version {number}")
+        return max(version, len(migrations))
+
+    def close(self):
+        """Close every connection this storage has opened"""
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                self.logger.warning(f"Error closing database connection: {e}")
+        self._local = threading.local()
+
+    def _retry(self, operation: Callable):
+        attempt = 0
+        while True:
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(0, 0.05 * (2 ** attempt))
+                attempt += 1
+                self.logger.debug(f"Database busy, retry {attempt} in {delay:.3f}s")
+                time.sleep(delay)
+
+_storages: Dict[str, SQLiteStorage] = {}
+_storages_lock = threading.Lock()
+
+def get_storage(db_path: Optional[str] = None) -> SQLiteStorage:
+    """Return the process-wide storage for ``db_path`` (the app database by default)"""
+    db_path = db_path or Config.SQLITE_DB
+    with _storages_lock:
+        storage = _storages.get(db_path)
+        if storage is None:
+            storage = SQLiteStorage(db_path)
+            _storages[db_path] = storage
+            atexit.register(storage.close)
+        return storage
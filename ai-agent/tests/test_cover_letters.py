@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cover_letters import CoverLetterStore, posting_signature
+from job_scraper import HTML_PARSER, JobScraper
+
+# Naukri result cards as the listing page serves them: the same role in two
+# cities, and a different role at the same company under the same title
+NAUKRI_LISTING = """
+<div class="jobTuple">
+  <a class="title" href="/job-listings-python-developer-acme-mumbai-1">Python Developer</a>
+  <a class="subTitle">Acme Technologies Pvt Ltd</a>
+  <span class="location">Mumbai, Maharashtra</span>
+  <span class="experience">3-5 Yrs</span>
+  <div class="tags">Python, Django, REST APIs, PostgreSQL, AWS</div>
+</div>
+<div class="jobTuple">
+  <a class="title" href="/job-listings-python-developer-acme-pune-2">Python Developer</a>
+  <a class="subTitle">Acme Technologies Pvt Ltd</a>
+  <span class="location">Pune, Maharashtra</span>
+  <span class="experience">3-5 Yrs</span>
+  <div class="tags">Python, Django, REST APIs, PostgreSQL, AWS</div>
+</div>
+<div class="jobTuple">
+  <a class="title" href="/job-listings-python-developer-acme-mumbai-3">Python Developer</a>
+  <a class="subTitle">Acme Technologies Pvt Ltd</a>
+  <span class="location">Mumbai, Maharashtra</span>
+  <span class="experience">0-1 Yrs</span>
+  <div class="tags">Python, Pandas, NumPy, Machine Learning, TensorFlow</div>
+</div>
+"""
+
+PROFILE = {'name': 'Asha', 'skills': ['Python', 'Django']}
+
+@pytest.fixture
+def scraped_jobs(monkeypatch):
+    scraper = JobScraper()
+    monkeypatch.setattr(scraper, '_fetch_html', lambda url: BeautifulSoup(NAUKRI_LISTING, HTML_PARSER))
+    jobs = list(scraper._iter_http_page('naukri', 'https://www.naukri.com/python-developer-jobs-in-mumbai', 10))
+    assert len(jobs) == 3
+    assert all('description' not in job for job in jobs)
+    return jobs
+
+@pytest.fixture
+def store(tmp_path):
+    return CoverLetterStore(db_path=str(tmp_path / 'letters.db'))
+
+def test_scraped_jobs_have_signatures(scraped_jobs):
+    assert all(posting_signature(job) for job in scraped_jobs)
+
+def test_letter_reused_for_same_role_in_another_city(store, scraped_jobs):
+    mumbai, pune, _ = scraped_jobs
+    letter = "I'd love to join Acme Technologies Pvt Ltd as a Python Developer in Mumbai, Maharashtra."
+    store.add_template('u1', PROFILE, mumbai, letter)
+
+    reused = store.find_similar('u1', PROFILE, pune)
+    assert reused == "I'd love to join Acme Technologies Pvt Ltd as a Python Developer in Pune, Maharashtra."
+    assert store.get_stats()['reused'] == 1
+
+def test_letter_not_reused_for_different_role_with_same_title(store, scraped_jobs):
+    mumbai, _, other_role = scraped_jobs
+    store.add_template('u1', PROFILE, mumbai, "Letter for the Django role at Acme Technologies Pvt Ltd.")
+
+    assert store.find_similar('u1', PROFILE, other_role) is None
@@ -15,6 +15,7 @@ from profile_analyzer import ProfileAnalyzer
 from job_scraper import JobScraper
 from application_agent import ApplicationAgent
 from scheduler import JobApplicationScheduler
+from job_dedup import dedupe_jobs
 
 app = Flask(__name__)
 app.secret_key = 'ai_agent_secret_key_2024'
@@ -92,6 +93,10 @@ def profile():
             session['profiles'] = {}
         
         session['profiles'][user_id] = data
+        
+        # Re-analyze for the running scheduler and drop letters written from the old profile
+        if scheduler and user_id in scheduler.agents:
+            scheduler.update_user_profile(user_id, data)
         return jsonify({'success': True})
     
     # Return profile if exists
@@ -131,14 +136,8 @@ def search_jobs():
             except Exception as e:
                 print(f"Error scraping Indeed India: {e}")
         
-        # Remove duplicates
-        unique_jobs = []
-        seen = set()
-        for job in jobs:
-            key = f"{job['title']}_{job['company']}"
-            if key not in seen:
-                seen.add(key)
-                unique_jobs.append(job)
+        # Remove duplicates, including near-identical cross-posts
+        unique_jobs = dedupe_jobs(jobs)
         
         scraper.close_driver()
         
@@ -178,8 +177,19 @@ def apply_to_job():
             'source': data.get('source', 'generic')
         }
         
-        # Apply to job
-        success = agent.apply_to_job(job, profile)
+        # Limits are shared with the scheduler's agents, so say when to retry
+        free_at = agent.next_application_slot(job['source'])
+        if free_at > time.time():
+            return jsonify({
+                'error': 'Application limit reached',
+                'retry_after': int(free_at - time.time()) + 1
+            }), 429
+        
+        # Apply to job, returning the pooled browser whatever happens
+        try:
+            success = agent.apply_to_job(job, profile)
+        finally:
+            agent.release_driver()
         
         if success:
             return jsonify({'success': True, 'message': 'Application submitted successfully'})